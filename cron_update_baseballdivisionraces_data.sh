@@ -2,13 +2,10 @@
 
 pushd /home/gregstoll/projects/baseballdivisionraces.git > /dev/null
 . .venv/bin/activate
-.venv/bin/python3 getmlbstandings/getmlbstandings.py -u
-oldfilesize=$(wc -c <"showdivisionraces/dist/data/$(date +%Y).json")
-newfilesize=$(wc -c <"getmlbstandings/data/$(date +%Y).json")
-#echo "old file size $oldfilesize"
-#echo "new file size $newfilesize"
-if [ $newfilesize -ge $oldfilesize ]; then
-    #echo "copying"
-    cp getmlbstandings/data/$(date +%Y).json showdivisionraces/dist/data
-fi
+# only refetches the last few days, and only publishes the file into dist (under a content-hashed
+# name listed in dist/data/manifest.json) if it changed and didn't shrink
+# point METRICS_FILE at node_exporter's textfile directory to scrape the run's timings
+.venv/bin/python3 getmlbstandings/getmlbstandings.py -u --publish showdivisionraces/dist/data --metrics "${METRICS_FILE:-getmlbstandings/metrics.prom}"
+# playoff odds for every day of this season, skipped if the standings haven't changed since last time
+.venv/bin/python3 -m getmlbstandings.playoffodds
 popd > /dev/null
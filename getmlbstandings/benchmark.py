@@ -0,0 +1,262 @@
+from __future__ import annotations
+import contextlib
+import datetime
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+from unittest import mock
+
+import numpy as np
+
+from getmlbstandings.getmlbstandings import DivisionId, MlbMetadata, MlbYearStandings, RateLimiter, StandingsFetcher
+
+# Times the scraper's hot paths against made-up seasons, so performance changes can be
+# checked for regressions without hitting StatsAPI:
+#
+#   python -m getmlbstandings.benchmark [--scales 1,10,100] [--repeat N] [--latency SECONDS]
+#                                       [--anomalies N] [--save FILE] [--compare FILE]
+#
+# A scale of 10 means 10 times as many divisions (and teams) as a real season.
+
+# kinds of bad data we can put in a synthetic season, all of which validation can fix
+ANOMALY_KINDS = ("missing_team", "missing_division", "wins_dip")
+
+class SyntheticSeason:
+    """A made-up season that looks like a real one: every team plays one game a day
+    (against a random opponent, and better teams win more) except on off days, until
+    everyone has played `games` games or the season gets cut short after `strike_day`.
+
+    records[day, team] is [wins, losses] at the end of the day, where day 0 is opening day
+    and the last day is the last one with games."""
+    def __init__(self, year: int = 2019, divisions: int = 6, teams_per_division: int = 5, games: int = 162,
+                 opening_day: Optional[datetime.date] = None, off_day_rate: float = 0.1,
+                 strike_day: Optional[int] = None, anomalies: int = 0, stale_preseason: bool = False, seed: int = 0):
+        self.year = year
+        self.opening_day = opening_day if opening_day is not None else datetime.date(year=year, month=3, day=28)
+        self.stale_preseason = stale_preseason
+        rng = np.random.default_rng(seed)
+        # first half of the divisions are in the AL, second half in the NL
+        self.division_ids : list[DivisionId] = [DivisionId(200 + i) for i in range(divisions)]
+        self.division_names : dict[DivisionId, str] = dict()
+        self.team_names : list[str] = []
+        self.team_divisions : list[DivisionId] = []
+        for (i, division_id) in enumerate(self.division_ids):
+            league = "American League" if i < (divisions + 1) // 2 else "National League"
+            self.division_names[division_id] = f"{league} Division {i + 1}"
+            for j in range(teams_per_division):
+                self.team_names.append(f"Team {i + 1}-{j + 1}")
+                self.team_divisions.append(division_id)
+        num_teams = len(self.team_names)
+        strengths = np.clip(rng.normal(0.5, 0.06, num_teams), 0.3, 0.7)
+
+        daily_results = []
+        self.off_days : list[int] = []
+        games_played = np.zeros(num_teams, dtype=np.int32)
+        day = 0
+        while games_played.min() < games and (strike_day is None or day <= strike_day):
+            results = np.zeros((num_teams, 2), dtype=np.int16)
+            if day > 0 and rng.random() < off_day_rate:
+                self.off_days.append(day)
+            else:
+                # if there's an odd number of teams the last one sits out
+                matchups = rng.permutation(num_teams)[:num_teams - num_teams % 2].reshape(-1, 2)
+                (home, away) = (matchups[:, 0], matchups[:, 1])
+                home_wins = rng.random(len(matchups)) < strengths[home] / (strengths[home] + strengths[away])
+                winners = np.where(home_wins, home, away)
+                losers = np.where(home_wins, away, home)
+                results[winners, 0] = 1
+                results[losers, 1] = 1
+                games_played[matchups.ravel()] += 1
+            daily_results.append(results)
+            day += 1
+        self.records = np.cumsum(np.array(daily_results), axis=0, dtype=np.int16)
+
+        # day number -> [(kind, team)]; not on the first or last day so they can be fixed
+        self.anomalies : dict[int, list[tuple[str, int]]] = dict()
+        # a dip has to be right before an off day, or the next day looks like a jump in games
+        dip_days = [off_day - 1 for off_day in self.off_days if 1 < off_day - 1 < self.num_days - 1]
+        for i in range(anomalies):
+            kind = ANOMALY_KINDS[i % len(ANOMALY_KINDS)]
+            if kind == "wins_dip":
+                if len(dip_days) == 0:
+                    continue
+                day = int(rng.choice(dip_days))
+            else:
+                day = int(rng.integers(1, self.num_days - 1))
+            self.anomalies.setdefault(day, []).append((kind, int(rng.integers(num_teams))))
+
+    @property
+    def num_days(self) -> int:
+        return len(self.records)
+
+    @property
+    def last_day(self) -> datetime.date:
+        return datetime.date.fromordinal(self.opening_day.toordinal() + self.num_days - 1)
+
+    def day_number(self, date: datetime.date) -> int:
+        return date.toordinal() - self.opening_day.toordinal()
+
+    def raw_standings(self, date: datetime.date) -> dict:
+        """What statsapi.standings_data would return for the day."""
+        day_number = self.day_number(date)
+        if day_number < 0:
+            if not self.stale_preseason:
+                return {}
+            # like 2005, last season's final standings
+            records = np.full((len(self.team_names), 2), 81, dtype=np.int16)
+        else:
+            records = self.records[min(day_number, self.num_days - 1)].copy()
+        anomalies = self.anomalies.get(day_number, []) if day_number < self.num_days else []
+        missing_teams = set()
+        missing_divisions = set()
+        for (kind, team) in anomalies:
+            if kind == "missing_team":
+                missing_teams.add(team)
+            elif kind == "missing_division":
+                missing_divisions.add(self.team_divisions[team])
+            elif kind == "wins_dip":
+                records[team] = self.records[day_number - 1, team]
+                records[team, 0] -= 1
+        data : dict = {}
+        for (team, team_name) in enumerate(self.team_names):
+            division_id = self.team_divisions[team]
+            if division_id in missing_divisions or team in missing_teams:
+                continue
+            if division_id not in data:
+                data[division_id] = {'div_name': self.division_names[division_id], 'teams': []}
+            data[division_id]['teams'].append({'name': team_name, 'team_id': 1000 + team,
+                                               'w': int(records[team, 0]), 'l': int(records[team, 1])})
+        return data
+
+class FakeStandingsSource:
+    """Stands in for statsapi.standings_data, answering from a synthetic season after
+    waiting `latency` seconds like a real request would."""
+    def __init__(self, season: SyntheticSeason, latency: float = 0.0, sleep: Callable[[float], None] = time.sleep):
+        self.season = season
+        self.latency = latency
+        self.sleep = sleep
+        self.calls = 0
+
+    def __call__(self, leagueId: str, date: str) -> dict:
+        self.calls += 1
+        if self.latency > 0:
+            self.sleep(self.latency)
+        return self.season.raw_standings(datetime.datetime.strptime(date, '%m/%d/%Y').date())
+
+def make_synthetic_fetcher(source: FakeStandingsSource, workers: int = 4) -> StandingsFetcher:
+    # no rate limit, we're only timing our side
+    return StandingsFetcher(quiet=True, workers=workers, rate_limiter=RateLimiter(rate=1e9, burst=1000), standings_source=source)
+
+class BenchmarkResult:
+    def __init__(self, name: str, scale: int, times: list[float]):
+        self.name = name
+        self.scale = scale
+        self.times = times
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    def __str__(self):
+        return f"{self.name:<24}{self.scale:>6}{self.best:>12.4f}{self.median:>12.4f}"
+
+    def __repr__(self):
+        return str(self)
+
+def format_benchmark_results(results: list[BenchmarkResult], baseline: Optional[dict] = None) -> str:
+    """`baseline` is what --save wrote for an earlier run, to show how much slower (> 1) or faster (< 1) each one is."""
+    header = f"{'Benchmark':<24}{'Scale':>6}{'Best (s)':>12}{'Median (s)':>12}"
+    lines = [header + (f"{'vs. baseline':>14}" if baseline is not None else "")]
+    for result in results:
+        line = str(result)
+        if baseline is not None:
+            baseline_best = baseline.get(result.name, {}).get(str(result.scale))
+            line += f"{result.best / baseline_best:>13.2f}x" if baseline_best else f"{'-':>14}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def results_to_json(results: list[BenchmarkResult]) -> dict:
+    j : dict = {}
+    for result in results:
+        j.setdefault(result.name, {})[str(result.scale)] = result.best
+    return j
+
+def time_call(call: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> list[float]:
+    # setup's return value is passed to call, and isn't timed
+    times = []
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if setup is not None:
+                call(argument)
+            else:
+                call()
+            times.append(time.perf_counter() - start)
+    return times
+
+def run_benchmarks(scales: list[int], repeat: int = 3, latency: float = 0.0, anomalies: int = 6, seed: int = 0) -> list[BenchmarkResult]:
+    results = []
+    for scale in scales:
+        season = SyntheticSeason(divisions=6 * scale, anomalies=anomalies, seed=seed)
+        year = season.year
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            # keep the synthetic season out of the real data directory
+            with mock.patch('getmlbstandings.getmlbstandings.get_json_file_path', lambda year: temp_path / f"{year}.json"):
+                fetcher = make_synthetic_fetcher(FakeStandingsSource(season, latency))
+                metadata = MlbMetadata.get_metadata(year, quiet=True, fetcher=fetcher)
+
+                def new_standings() -> MlbYearStandings:
+                    return MlbYearStandings(metadata, quiet=True, fetcher=make_synthetic_fetcher(FakeStandingsSource(season, latency)))
+                results.append(BenchmarkResult("populate", scale, time_call(lambda standings: standings.populate(), repeat, new_standings)))
+
+                days = [datetime.date.fromordinal(season.opening_day.toordinal() + day_number) for day_number in range(season.num_days)]
+                raw_days = [(day, season.raw_standings(day)) for day in days]
+                def store_all_days(standings: MlbYearStandings):
+                    for (day, data) in raw_days:
+                        standings._store_day_data(day, data)
+                results.append(BenchmarkResult("_store_day_data", scale, time_call(store_all_days, repeat, new_standings)))
+
+                # validate what we got before it's been fixed
+                standings = new_standings()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    standings.populate()
+                standings.write_to_json()
+                def load_standings() -> MlbYearStandings:
+                    # the standings are parsed the first time they're used, which counts as loading
+                    loaded = MlbYearStandings.load(year, quiet=True)
+                    loaded.store
+                    return loaded
+                results.append(BenchmarkResult("validate_and_fix_data", scale,
+                                               time_call(lambda standings: standings.validate_and_fix_data(), repeat, load_standings)))
+                results.append(BenchmarkResult("load_from_file", scale, time_call(load_standings, repeat)))
+                results.append(BenchmarkResult("write_to_json", scale, time_call(standings.write_to_json, repeat)))
+    return results
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    def option(name: str, default: str) -> str:
+        if name in args:
+            return args[args.index(name) + 1]
+        return default
+    scales = [int(scale) for scale in option('--scales', "1,10,100").split(',')]
+    results = run_benchmarks(scales, repeat=int(option('--repeat', "3")), latency=float(option('--latency', "0")),
+                             anomalies=int(option('--anomalies', "6")))
+    baseline = None
+    if '--compare' in args:
+        with open(option('--compare', ""), 'r') as f:
+            baseline = json.load(f)
+    print(format_benchmark_results(results, baseline))
+    if '--save' in args:
+        with open(option('--save', ""), 'w') as f:
+            json.dump(results_to_json(results), f, indent=2)
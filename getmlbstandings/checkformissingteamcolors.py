@@ -1,15 +1,17 @@
-import json
 import os
 import sys
+from pathlib import Path
+
+# run from this directory, so this is the getmlbstandings.py next to us
+from getmlbstandings import SeasonFile
 
 if __name__ == '__main__':
     teamNames = set()
     for fileName in os.listdir('data'):
         if fileName.endswith(".json"):
-            with open('data/' + fileName, 'r') as file:
-                data_json = json.load(file)
-                for divisionId in data_json['metadata'].keys():
-                    teamNames.update(data_json['metadata'][divisionId]['teams'])
+            metadata = SeasonFile.open(Path('data') / fileName).metadata_json
+            for divisionId in metadata.keys():
+                teamNames.update(metadata[divisionId]['teams'])
     
     print(teamNames)
     with open('../showdivisionraces/src/app.ts', 'r') as file:
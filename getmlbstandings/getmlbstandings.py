@@ -1,13 +1,30 @@
 from __future__ import annotations, division
+import contextlib
 import datetime
+import gzip
+import hashlib
+import itertools
 import json
 import os
+import subprocess
+import threading
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import MutableMapping
 from pathlib import Path
-from typing import NewType, Optional
+from typing import TYPE_CHECKING, Callable, Iterator, NewType, Optional
 
-import statsapi
+import numpy as np
+# statsapi, requests and multiprocessing are imported where they're used, so tools
+# that only work with the files on disk start quickly
+if TYPE_CHECKING:
+    import requests
+try:
+    import brotli
+except ImportError:
+    # only needed to write .br files
+    brotli = None
 
 def get_opening_day_guess(year: int) -> datetime.date:
     if year == 2020:
@@ -49,9 +66,12 @@ class MlbMetadata:
         return str(self)
 
     @classmethod
-    def get_metadata(cls, year: int, quiet: bool) -> MlbMetadata:
+    def get_metadata(cls, year: int, quiet: bool, fetcher: Optional[StandingsFetcher] = None) -> MlbMetadata:
+        if fetcher is None:
+            fetcher = StandingsFetcher(quiet)
         # pick a day in the middle of the season (even in 2020)
-        raw_data = get_raw_standings_data(datetime.date(year=year, month=8, day=1), quiet)
+        with fetcher.metrics.stage("metadata"):
+            raw_data = fetcher.fetch(datetime.date(year=year, month=8, day=1))
         metadata = cls(year)
         for division_id in raw_data:
             metadata.add_division_info(DivisionId(int(division_id)), raw_data[division_id])
@@ -60,25 +80,25 @@ class MlbMetadata:
     
     @classmethod
     def load_from_file(cls, year: int) -> Optional[MlbMetadata]:
-        file_path = get_json_file_path(year)
-        if not file_path.exists():
-            return None
-        try:
-            with open(file_path, 'r') as f:
-                j = json.load(f)
-                metadata = cls(year)
-                metadataJson = j['metadata']
-                for division_id in metadataJson.keys():
-                    divisionInfoJson = metadataJson[division_id]
-                    divisionInfo = DivisionInfo(division_id, divisionInfoJson['name'])
-                    divisionInfo.team_names = divisionInfoJson['teams']
-                    metadata.id_to_division_info_dict[int(division_id)] = divisionInfo
-                return metadata
-        except json.JSONDecodeError:
+        season_file = SeasonFile.open(get_json_file_path(year))
+        if season_file is None:
             return None
+        return cls.from_json(year, season_file.metadata_json)
+
+    @classmethod
+    def from_json(cls, year: int, metadataJson: dict) -> MlbMetadata:
+        metadata = cls(year)
+        for division_id in metadataJson.keys():
+            divisionInfoJson = metadataJson[division_id]
+            divisionInfo = DivisionInfo(division_id, divisionInfoJson['name'])
+            divisionInfo.team_names = divisionInfoJson['teams']
+            metadata.id_to_division_info_dict[int(division_id)] = divisionInfo
+        return metadata
 
 
 class TeamStanding:
+    __slots__ = ('team_id', 'wins', 'losses')
+
     def __init__(self, team_id: Optional[TeamId], wins: int, losses: int):
         self.team_id = team_id
         self.wins = wins
@@ -138,219 +158,1082 @@ def get_json_file_path(year: int) -> Path:
     data_path = Path(os.path.realpath(__file__)).parent / "data"
     return data_path / f"{year}.json"
 
+def get_derived_json_file_path(year: int) -> Path:
+    return get_json_file_path(year).parent / "derived" / f"{year}.json"
+
+def get_compact_json_file_path(year: int) -> Path:
+    return get_json_file_path(year).parent / "compact" / f"{year}.json"
+
+class SeasonFile:
+    """A season's file, with the metadata and opening day parsed up front and the
+    standings (almost all of the file) not parsed until they're needed."""
+    # how write_to_json lays out the file
+    METADATA_PREFIX = '{"metadata": '
+    OPENING_DAY_PREFIX = ', "opening_day": '
+    STANDINGS_PREFIX = ', "standings": '
+
+    def __init__(self, contents: str):
+        self.contents = contents
+        self.standings_position : Optional[int] = None
+        self.parsed : Optional[dict] = None
+        decoder = json.JSONDecoder()
+        try:
+            if not contents.startswith(self.METADATA_PREFIX):
+                raise ValueError("not laid out like we write it")
+            (self.metadata_json, position) = decoder.raw_decode(contents, len(self.METADATA_PREFIX))
+            if not contents.startswith(self.OPENING_DAY_PREFIX, position):
+                raise ValueError("not laid out like we write it")
+            (self.opening_day_json, position) = decoder.raw_decode(contents, position + len(self.OPENING_DAY_PREFIX))
+            if not contents.startswith(self.STANDINGS_PREFIX, position) or not contents.rstrip().endswith("]}"):
+                raise ValueError("not laid out like we write it")
+            self.standings_position = position + len(self.STANDINGS_PREFIX)
+        except ValueError:
+            # anything else that's valid JSON works too, it just all gets parsed now
+            self.parsed = json.loads(contents)
+            self.metadata_json = self.parsed['metadata']
+            self.opening_day_json = self.parsed['opening_day']
+
+    @classmethod
+    def open(cls, file_path: Path) -> Optional[SeasonFile]:
+        """Returns None if the file isn't there or isn't valid."""
+        try:
+            with open(file_path, 'r') as f:
+                return cls(f.read())
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+
+    @property
+    def opening_day(self) -> datetime.date:
+        return datetime.datetime.strptime(self.opening_day_json, "%Y/%m/%d").date()
+
+    def standings_json(self) -> list[dict]:
+        if self.parsed is not None:
+            return self.parsed['standings']
+        return json.JSONDecoder().raw_decode(self.contents, self.standings_position)[0]
+
+def get_division_name_sort_key(division_name: str) -> int:
+    # same order as the page: AL before NL, then West, Central, East
+    key = 0
+    if "National League" in division_name:
+        key += 100
+    if "Central" in division_name:
+        key += 1
+    if "East" in division_name:
+        key += 2
+    return key
+
+# a game that ended in one of these counts in the standings
+FINAL_GAME_STATES = {"Final", "Game Over", "Completed Early"}
+
+def standings_from_schedule(team_index: TeamIndex, schedule: dict, today: datetime.date, quiet: bool) -> StandingsStore:
+    """Builds a season's standings from the raw schedule endpoint response.
+
+    The first day is the day before the first game (with everyone at 0-0) and the
+    last is the last day with a game before today, with a row for every day in
+    between, just like what we get from fetching the standings every day.
+
+    A suspended game that's resumed later is listed (with the same gamePk) on both days,
+    so each game only counts once, on the last day it's listed as final."""
+    team_columns = {team_name: column for ((_, team_name), column) in team_index.columns.items()}
+    # gamePk -> (date ordinal, winner column, loser column)
+    results : dict[object, tuple[int, int, int]] = {}
+    # for games without a gamePk, which can't be duplicates
+    unkeyed_games = itertools.count()
+    for date_json in schedule.get('dates', []):
+        date = datetime.date.fromisoformat(date_json['date'])
+        if date >= today:
+            continue
+        for game in date_json['games']:
+            if game.get('gameType', 'R') != 'R' or game['status']['detailedState'] not in FINAL_GAME_STATES:
+                continue
+            away = game['teams']['away']
+            home = game['teams']['home']
+            if away.get('isWinner'):
+                (winner, loser) = (away['team']['name'], home['team']['name'])
+            elif home.get('isWinner'):
+                (winner, loser) = (home['team']['name'], away['team']['name'])
+            else:
+                # a tie doesn't count as a win or a loss
+                continue
+            if winner not in team_columns or loser not in team_columns:
+                if not quiet:
+                    print(f"Unknown team in game on {date}: {winner} vs. {loser}")
+                continue
+            key = game['gamePk'] if 'gamePk' in game else ('unkeyed', next(unkeyed_games))
+            if key not in results or results[key][0] < date.toordinal():
+                results[key] = (date.toordinal(), team_columns[winner], team_columns[loser])
+
+    store = StandingsStore(team_index)
+    if len(results) == 0:
+        return store
+    results_array = np.array(list(results.values()), dtype=np.int64)
+    first_day = datetime.date.fromordinal(int(results_array[:, 0].min()) - 1)
+    num_days = int(results_array[:, 0].max()) - first_day.toordinal() + 1
+    day_numbers = results_array[:, 0] - first_day.toordinal()
+    daily_results = np.zeros((num_days, team_index.num_teams, 2), dtype=np.int16)
+    np.add.at(daily_results, (day_numbers, results_array[:, 1], 0), 1)
+    np.add.at(daily_results, (day_numbers, results_array[:, 2], 1), 1)
+    store._allocate(first_day, num_days)
+    store.records[:] = np.cumsum(daily_results, axis=0)
+    store.has_division[:] = True
+    return store
+
+def write_file_atomically(file_path: Path, contents: bytes):
+    """Writes to a temporary file and renames it into place, so readers never see a partial file."""
+    os.makedirs(file_path.parent, exist_ok=True)
+    temp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(contents)
+    os.replace(temp_path, file_path)
+
+# so a missing brotli only gets mentioned once per run
+warned_about_brotli = False
+
+def write_precompressed_files(file_path: Path, contents: bytes):
+    """Writes .gz (and .br, if brotli is installed) versions of contents next to file_path,
+    so the web server can send them without compressing on every request."""
+    write_file_atomically(file_path.with_name(file_path.name + ".gz"), gzip.compress(contents, compresslevel=9, mtime=0))
+    global warned_about_brotli
+    if brotli is not None:
+        write_file_atomically(file_path.with_name(file_path.name + ".br"), brotli.compress(contents))
+    elif not warned_about_brotli:
+        warned_about_brotli = True
+        print("WARNING: brotli isn't installed (it's in requirements.txt), so only writing .gz files", file=sys.stderr)
+
+COMPACT_FORMAT = "compact-1"
+
+def compact_season_json(j: dict) -> dict:
+    """Converts a season's JSON (as written by write_to_json) to the compact format.
+
+    The compact format has the opening day's records as "baseline" (wins and losses
+    for every team, in metadata order), then one entry in "days" for each later day:
+    - a number n means the next n days didn't change at all
+    - a string has one digit per team, 3 * (wins added) + (losses added), for the
+      usual case where no team added more than 2 wins or losses
+    - otherwise a list of the wins and losses added for every team"""
+    division_keys = list(j['metadata'].keys())
+    for entry in j['standings']:
+        if list(entry.keys()) != division_keys:
+            raise ValueError(f"Can't make compact file, day is missing divisions: {entry.keys()}")
+        for division_key in division_keys:
+            if len(entry[division_key]) != len(j['metadata'][division_key]['teams']):
+                raise ValueError(f"Can't make compact file, division {division_key} is missing teams")
+    records = np.array([[wl for division_key in division_keys for wl in entry[division_key]] for entry in j['standings']],
+                       dtype=np.int32).reshape((len(j['standings']), -1, 2))
+    days : list = []
+    for changes in np.diff(records, axis=0):
+        if not changes.any():
+            if len(days) > 0 and isinstance(days[-1], int):
+                days[-1] += 1
+            else:
+                days.append(1)
+        elif changes.min() >= 0 and changes.max() <= 2:
+            days.append("".join(str(digit) for digit in (changes[:, 0] * 3 + changes[:, 1]).tolist()))
+        else:
+            days.append(changes.reshape(-1).tolist())
+    return {'format': COMPACT_FORMAT,
+            'metadata': j['metadata'],
+            'opening_day': j['opening_day'],
+            'baseline': records[0].reshape(-1).tolist() if len(records) > 0 else [],
+            'days': days}
+
+def expand_season_json(compact: dict) -> dict:
+    """The inverse of compact_season_json, giving exactly what json.load gives for the normal file."""
+    if compact.get('format') != COMPACT_FORMAT:
+        raise ValueError(f"Unknown compact format {compact.get('format')}")
+    metadata = compact['metadata']
+    division_keys = list(metadata.keys())
+    num_teams = sum(len(metadata[division_key]['teams']) for division_key in division_keys)
+    if len(compact['baseline']) == 0:
+        return {'metadata': metadata, 'opening_day': compact['opening_day'], 'standings': []}
+    all_changes = []
+    for entry in compact['days']:
+        if isinstance(entry, int):
+            all_changes.extend([np.zeros((num_teams, 2), dtype=np.int32)] * entry)
+        elif isinstance(entry, str):
+            digits = np.frombuffer(entry.encode('ascii'), dtype=np.uint8).astype(np.int32) - ord('0')
+            all_changes.append(np.stack([digits // 3, digits % 3], axis=-1))
+        else:
+            all_changes.append(np.array(entry, dtype=np.int32).reshape((num_teams, 2)))
+    records = np.concatenate([np.array(compact['baseline'], dtype=np.int32).reshape((1, num_teams, 2)),
+                              np.array(all_changes, dtype=np.int32).reshape((-1, num_teams, 2))])
+    records = np.cumsum(records, axis=0)
+    division_slices = []
+    start = 0
+    for division_key in division_keys:
+        division_slices.append((division_key, slice(start, start + len(metadata[division_key]['teams']))))
+        start += len(metadata[division_key]['teams'])
+    standings = [{division_key: day[division_slice] for (division_key, division_slice) in division_slices}
+                 for day in records.tolist()]
+    return {'metadata': metadata, 'opening_day': compact['opening_day'], 'standings': standings}
+
+def write_compact_json_file(year: int):
+    """Writes the compact version of the year's file (plus precompressed copies)."""
+    with open(get_json_file_path(year), 'r') as f:
+        j = json.load(f)
+    contents = json.dumps(compact_season_json(j), separators=(',', ':')).encode('utf-8')
+    compact_file_path = get_compact_json_file_path(year)
+    write_file_atomically(compact_file_path, contents)
+    write_precompressed_files(compact_file_path, contents)
+
+def load_compact_json_file(year: int) -> dict:
+    with open(get_compact_json_file_path(year), 'r') as f:
+        return expand_season_json(json.load(f))
+
+MANIFEST_FORMAT = "manifest-1"
+MANIFEST_FILE_NAME = "manifest.json"
+# how many hex digits of the content's SHA-256 go in a published file's name
+CONTENT_HASH_LENGTH = 16
+# how long a published file sticks around after the manifest stops pointing at it
+PUBLISHED_FILE_GRACE_SECONDS = 24 * 60 * 60
+
+def get_content_hash(contents: bytes) -> str:
+    return hashlib.sha256(contents).hexdigest()[:CONTENT_HASH_LENGTH]
+
+def load_manifest(destination_path: Path) -> dict:
+    """The manifest of what's published in destination_path, which maps each year to its
+    files and day count. Empty if there isn't one yet."""
+    try:
+        with open(destination_path / MANIFEST_FILE_NAME, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format') == MANIFEST_FORMAT:
+            return manifest
+    except (OSError, json.JSONDecodeError):
+        pass
+    return {'format': MANIFEST_FORMAT, 'seasons': {}}
+
+def publish_file(file_path: Path, destination_path: Path) -> str:
+    """Copies file_path (plus precompressed copies) into destination_path under a name with its
+    content hash in it, so it never changes once it's there and can be cached forever.
+    Returns the published name."""
+    with open(file_path, 'rb') as f:
+        contents = f.read()
+    published_name = f"{file_path.stem}.{get_content_hash(contents)}{file_path.suffix}"
+    destination_file_path = destination_path / published_name
+    # the same name means the same contents, so there's nothing to do
+    if not destination_file_path.exists():
+        # the compressed copies go first, so they're there as soon as the file is
+        write_precompressed_files(destination_file_path, contents)
+        write_file_atomically(destination_file_path, contents)
+    return published_name
+
+def remove_unpublished_files(directory: Path, year: int, keep: set[str]):
+    """Deletes the year's hashed files (and their compressed copies) in directory, except the
+    ones in keep and ones superseded less than PUBLISHED_FILE_GRACE_SECONDS ago."""
+    cutoff = time.time() - PUBLISHED_FILE_GRACE_SECONDS
+    for file_path in directory.glob(f"{year}.*.json*"):
+        if file_path.name.split(".json")[0] + ".json" not in keep and file_path.stat().st_mtime < cutoff:
+            file_path.unlink()
+
+def mark_superseded(file_path: Path):
+    """Starts the file's grace period, by setting its (and its compressed copies') mtime to now."""
+    for copy_path in (file_path, file_path.with_name(file_path.name + ".gz"), file_path.with_name(file_path.name + ".br")):
+        if copy_path.exists():
+            os.utime(copy_path)
+
+def publish_json_file(year: int, destination_path: Path) -> bool:
+    """Publishes the year's file (and its derived file, if there is one) into destination_path
+    under content-hashed names, then points manifest.json at them. Doesn't publish if the
+    manifest's copy has more days, which means something went wrong, or is the same.
+    Returns whether it was published.
+
+    Files that are no longer in the manifest are kept for PUBLISHED_FILE_GRACE_SECONDS, for
+    pages that loaded an older manifest."""
+    file_path = get_json_file_path(year)
+    season_file = SeasonFile.open(file_path)
+    if season_file is None:
+        return False
+    num_days = len(season_file.standings_json())
+    manifest = load_manifest(destination_path)
+    old_entry = manifest['seasons'].get(str(year))
+    if old_entry is not None and old_entry['days'] > num_days:
+        return False
+    published_name = publish_file(file_path, destination_path)
+    entry = {'file': published_name, 'hash': published_name.split('.')[-2], 'days': num_days}
+    derived_file_path = get_derived_json_file_path(year)
+    derived_directory = derived_file_path.parent.name
+    if derived_file_path.exists():
+        entry['derived'] = f"{derived_directory}/{publish_file(derived_file_path, destination_path / derived_directory)}"
+    if entry == old_entry:
+        return False
+    manifest['seasons'][str(year)] = entry
+    manifest['seasons'] = dict(sorted(manifest['seasons'].items()))
+    write_file_atomically(destination_path / MANIFEST_FILE_NAME, json.dumps(manifest, indent=1).encode('utf-8'))
+    if old_entry is not None:
+        for key in ('file', 'derived'):
+            if key in old_entry and old_entry[key] != entry.get(key):
+                mark_superseded(destination_path / old_entry[key])
+    remove_unpublished_files(destination_path, year, {entry['file']})
+    if (destination_path / derived_directory).exists():
+        remove_unpublished_files(destination_path / derived_directory, year, {entry.get('derived', "").split('/')[-1]})
+    return True
+
+class TeamIndex:
+    """Assigns each team in the metadata a column in the standings arrays.
+
+    Columns are ordered by division id and then by team name within the division,
+    which is the same order the teams are written to JSON in."""
+    def __init__(self, metadata: MlbMetadata):
+        self.division_ids : list[DivisionId] = sorted(metadata.id_to_division_info_dict.keys())
+        self.division_slices : dict[DivisionId, slice] = dict()
+        self.team_names : list[str] = []
+        self.team_divisions : list[DivisionId] = []
+        self.columns : dict[tuple[DivisionId, str], int] = dict()
+        for division_id in self.division_ids:
+            start = len(self.team_names)
+            for team_name in metadata.id_to_division_info_dict[division_id].team_names:
+                self.columns[(division_id, team_name)] = len(self.team_names)
+                self.team_names.append(team_name)
+                self.team_divisions.append(division_id)
+            self.division_slices[division_id] = slice(start, len(self.team_names))
+        # for each column, the position of its division in division_ids
+        self.team_division_positions = np.array([self.division_ids.index(division_id) for division_id in self.team_divisions], dtype=np.intp)
+
+    @property
+    def num_teams(self) -> int:
+        return len(self.team_names)
+
+    @property
+    def num_divisions(self) -> int:
+        return len(self.division_ids)
+
+# marks a team we don't have wins/losses for on a given day
+MISSING = -1
+
+class StandingsStore:
+    """A season of standings stored in contiguous arrays, one row per day starting at first_day.
+
+    records[row, team] is [wins, losses] (or MISSING), team_ids[row, team] is the
+    StatsAPI team id (or 0 if we don't know it), and has_division[row, division]
+    says whether we have data for that division that day. A day is stored if
+    any of its divisions are.
+
+    fingerprints[row] is a hash of the day's records and divisions (but not team
+    ids), so comparing two days is O(1). It's 0 until it's computed, and anything
+    that changes a row resets it."""
+    def __init__(self, team_index: TeamIndex):
+        self.team_index = team_index
+        self.first_day : Optional[datetime.date] = None
+        self.records = np.full((0, team_index.num_teams, 2), MISSING, dtype=np.int16)
+        self.team_ids = np.zeros((0, team_index.num_teams), dtype=np.int32)
+        self.has_division = np.zeros((0, team_index.num_divisions), dtype=bool)
+        self.fingerprints = np.zeros(0, dtype=np.uint64)
+
+    @classmethod
+    def from_json_standings(cls, team_index: TeamIndex, opening_day: datetime.date, standings_json: list[dict]) -> StandingsStore:
+        store = cls(team_index)
+        store._allocate(opening_day, len(standings_json))
+        division_keys = [str(division_id) for division_id in team_index.division_ids]
+        try:
+            records = np.array([[wl for division_key in division_keys for wl in entry[division_key]] for entry in standings_json],
+                               dtype=np.int16).reshape((len(standings_json), team_index.num_teams, 2))
+            store.records[:] = records
+            store.has_division[:] = True
+        except (KeyError, ValueError):
+            # some days are missing divisions or teams, do it the slow way
+            for (row, entry) in enumerate(standings_json):
+                for (division_position, division_id) in enumerate(team_index.division_ids):
+                    division_key = str(division_id)
+                    if division_key not in entry:
+                        continue
+                    division_slice = store.team_index.division_slices[division_id]
+                    for (column, wl) in zip(range(division_slice.start, division_slice.stop), entry[division_key]):
+                        store.records[row, column] = wl
+                    store.has_division[row, division_position] = True
+        return store
+
+    def to_json_standings(self, since: Optional[datetime.date] = None) -> list[dict]:
+        standings_json = []
+        rows = self.rows()
+        if since is not None:
+            rows = rows[rows >= since.toordinal() - self.first_day.toordinal()]
+        for row in rows:
+            day_json = {}
+            for (division_position, division_id) in enumerate(self.team_index.division_ids):
+                if self.has_division[row, division_position]:
+                    day_json[division_id] = self.records[row, self.team_index.division_slices[division_id]].tolist()
+            standings_json.append(day_json)
+        return standings_json
+
+    def _allocate(self, first_day: datetime.date, num_rows: int):
+        self.first_day = first_day
+        self.records = np.full((num_rows, self.team_index.num_teams, 2), MISSING, dtype=np.int16)
+        self.team_ids = np.zeros((num_rows, self.team_index.num_teams), dtype=np.int32)
+        self.has_division = np.zeros((num_rows, self.team_index.num_divisions), dtype=bool)
+        self.fingerprints = np.zeros(num_rows, dtype=np.uint64)
+
+    def _grow(self, before: int, after: int):
+        def pad(array: np.ndarray, fill) -> np.ndarray:
+            return np.concatenate([np.full((before,) + array.shape[1:], fill, dtype=array.dtype),
+                                   array,
+                                   np.full((after,) + array.shape[1:], fill, dtype=array.dtype)])
+        self.records = pad(self.records, MISSING)
+        self.team_ids = pad(self.team_ids, 0)
+        self.has_division = pad(self.has_division, False)
+        self.fingerprints = pad(self.fingerprints, 0)
+        self.first_day = datetime.date.fromordinal(self.first_day.toordinal() - before)
+
+    def row(self, date: datetime.date) -> Optional[int]:
+        if self.first_day is None:
+            return None
+        row = date.toordinal() - self.first_day.toordinal()
+        if row < 0 or row >= len(self.records) or not self.has_division[row].any():
+            return None
+        return row
+
+    def _row_for_writing(self, date: datetime.date) -> int:
+        if self.first_day is None:
+            self._allocate(date, 32)
+        row = date.toordinal() - self.first_day.toordinal()
+        if row < 0:
+            self._grow(max(-row, len(self.records)), 0)
+        elif row >= len(self.records):
+            self._grow(0, max(row - len(self.records) + 1, len(self.records)))
+        return date.toordinal() - self.first_day.toordinal()
+
+    def rows(self) -> np.ndarray:
+        return np.flatnonzero(self.has_division.any(axis=1))
+
+    def row_date(self, row: int) -> datetime.date:
+        return datetime.date.fromordinal(self.first_day.toordinal() + int(row))
+
+    def days(self) -> list[datetime.date]:
+        return [self.row_date(row) for row in self.rows()]
+
+    def __contains__(self, date: datetime.date) -> bool:
+        return self.row(date) is not None
+
+    def __len__(self) -> int:
+        return len(self.rows())
+
+    def get_day(self, date: datetime.date) -> dict[DivisionId, list[Optional[TeamStanding]]]:
+        row = self.row(date)
+        if row is None:
+            raise KeyError(date)
+        day_data : dict[DivisionId, list[Optional[TeamStanding]]] = dict()
+        for (division_position, division_id) in enumerate(self.team_index.division_ids):
+            if not self.has_division[row, division_position]:
+                continue
+            standings : list[Optional[TeamStanding]] = []
+            for column in range(self.team_index.division_slices[division_id].start, self.team_index.division_slices[division_id].stop):
+                wins, losses = self.records[row, column]
+                if wins == MISSING:
+                    standings.append(None)
+                else:
+                    team_id = int(self.team_ids[row, column])
+                    standings.append(TeamStanding(TeamId(team_id) if team_id != 0 else None, int(wins), int(losses)))
+            day_data[division_id] = standings
+        return day_data
+
+    def set_day(self, date: datetime.date, day_data: dict[DivisionId, list[Optional[TeamStanding]]]):
+        row = self._row_for_writing(date)
+        self.clear_row(row)
+        for (division_position, division_id) in enumerate(self.team_index.division_ids):
+            if division_id not in day_data:
+                continue
+            division_slice = self.team_index.division_slices[division_id]
+            for (column, standing) in zip(range(division_slice.start, division_slice.stop), day_data[division_id]):
+                if standing is not None:
+                    self.records[row, column] = (standing.wins, standing.losses)
+                    self.team_ids[row, column] = standing.team_id or 0
+            self.has_division[row, division_position] = True
+        self.fingerprints[row] = 0
+
+    def set_team(self, date: datetime.date, division_id: DivisionId, team_name: str, team_id: Optional[TeamId], wins: int, losses: int):
+        row = self._row_for_writing(date)
+        column = self.team_index.columns[(division_id, team_name)]
+        self.records[row, column] = (wins, losses)
+        self.team_ids[row, column] = team_id or 0
+        self.has_division[row, self.team_index.division_ids.index(division_id)] = True
+        self.fingerprints[row] = 0
+
+    def copy_day(self, from_date: datetime.date, to_date: datetime.date):
+        to_row = self._row_for_writing(to_date)
+        from_row = self.row(from_date)
+        if from_row is None:
+            raise KeyError(from_date)
+        self.records[to_row] = self.records[from_row]
+        self.team_ids[to_row] = self.team_ids[from_row]
+        self.has_division[to_row] = self.has_division[from_row]
+        self.fingerprints[to_row] = self.fingerprints[from_row]
+
+    def clear_row(self, row: int):
+        self.records[row] = MISSING
+        self.team_ids[row] = 0
+        self.has_division[row] = False
+        self.fingerprints[row] = 0
+
+    def delete_day(self, date: datetime.date):
+        row = self.row(date)
+        if row is None:
+            raise KeyError(date)
+        self.clear_row(row)
+
+    def day_equals(self, date1: datetime.date, date2: datetime.date) -> bool:
+        # unlike day_data_equals (which compares team ids when both days have them), this
+        # intentionally ignores team ids, since the fingerprints only hash records and divisions
+        fingerprint1 = self.fingerprint(date1)
+        return fingerprint1 is not None and fingerprint1 == self.fingerprint(date2)
+
+    def fingerprint(self, date: datetime.date) -> Optional[int]:
+        """Returns the day's fingerprint (computing it if it's out of date), or None if the day isn't stored."""
+        row = self.row(date)
+        if row is None:
+            return None
+        if self.fingerprints[row] == 0:
+            self.update_fingerprint(row)
+        return int(self.fingerprints[row])
+
+    def update_fingerprint(self, row: int):
+        digest = hashlib.blake2b(self.records[row].tobytes() + self.has_division[row].tobytes(), digest_size=8).digest()
+        # 0 means it hasn't been computed
+        self.fingerprints[row] = max(int.from_bytes(digest, 'little'), 1)
+
+    def invalidate_fingerprints(self, rows):
+        self.fingerprints[rows] = 0
+
+class DayDataView(MutableMapping):
+    """Dict-like view of a StandingsStore, mapping each date to {division id: [TeamStanding]}.
+
+    The TeamStandings are built on demand and are copies, so to change a day
+    you have to assign it back."""
+    def __init__(self, store: StandingsStore):
+        self.store = store
+
+    def __getitem__(self, date: datetime.date) -> dict[DivisionId, list[Optional[TeamStanding]]]:
+        return self.store.get_day(date)
+
+    def __setitem__(self, date: datetime.date, day_data: dict[DivisionId, list[Optional[TeamStanding]]]):
+        self.store.set_day(date, day_data)
+
+    def __delitem__(self, date: datetime.date):
+        self.store.delete_day(date)
+
+    def __contains__(self, date) -> bool:
+        return date in self.store
+
+    def __iter__(self) -> Iterator[datetime.date]:
+        return iter(self.store.days())
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+class ValidationIssue:
+    # we fixed the data
+    FIXED = "fixed"
+    # something looks wrong but we're going to go on anyway
+    WARNING = "warning"
+    # the data is bad and we couldn't fix it
+    ERROR = "error"
+
+    def __init__(self, severity: str, date: Optional[datetime.date], division_id: Optional[DivisionId], message: str):
+        self.severity = severity
+        self.date = date
+        self.division_id = division_id
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"{self.severity}: {self.message}"
+
+class ValidationReport:
+    def __init__(self):
+        self.issues : list[ValidationIssue] = []
+
+    def add(self, severity: str, date: Optional[datetime.date], division_id: Optional[DivisionId], message: str):
+        self.issues.append(ValidationIssue(severity, date, division_id, message))
+
+    def of_severity(self, severity: str) -> list[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == severity]
+
+    @property
+    def ok(self) -> bool:
+        return len(self.of_severity(ValidationIssue.ERROR)) == 0
+
+    @property
+    def fix_count(self) -> int:
+        return len(self.of_severity(ValidationIssue.FIXED))
+
+    def __str__(self):
+        return "\n".join(repr(issue) for issue in self.issues)
+
+    def __repr__(self):
+        return str(self)
+
 class MlbYearStandings:
-    def __init__(self, metadata: MlbMetadata, quiet: bool):
+    def __init__(self, metadata: MlbMetadata, quiet: bool, fetcher: Optional[StandingsFetcher] = None):
         self.metadata = metadata
         self.quiet = quiet
-        self.all_day_data : dict[datetime.date, dict[DivisionId, list[TeamStanding]]] = dict()
-    
+        self.fetcher = fetcher if fetcher is not None else StandingsFetcher(quiet)
+        self.team_index = TeamIndex(metadata)
+        self._store = StandingsStore(self.team_index)
+        # standings we've read from the file but haven't parsed yet
+        self._season_file : Optional[SeasonFile] = None
+
+    @property
+    def store(self) -> StandingsStore:
+        if self._season_file is not None:
+            season_file = self._season_file
+            self._season_file = None
+            # load() only read the file, so this is where the time goes
+            with self.fetcher.metrics.stage("parse"):
+                self._store = StandingsStore.from_json_standings(self.team_index, season_file.opening_day, season_file.standings_json())
+        return self._store
+
+    @store.setter
+    def store(self, store: StandingsStore):
+        self._season_file = None
+        self._store = store
+
+    @property
+    def all_day_data(self) -> DayDataView:
+        return DayDataView(self.store)
+
     def load_from_file(self):
-        file_path = get_json_file_path(self.metadata.year)
         # if we're calling this we already know the file exists and is valid
-        with open(file_path, 'r') as f:
-            j = json.load(f)
-            current_day = datetime.datetime.strptime(j['opening_day'], "%Y/%m/%d").date()
-            for entry in j['standings']:
-                day_data : dict[DivisionId, list[TeamStanding]] = {}
-                for division_id in entry:
-                    standings = [TeamStanding(None, wl[0], wl[1]) for wl in entry[division_id]]
-                    day_data[DivisionId(int(division_id))] = standings
-                self.all_day_data[current_day] = day_data
-                current_day = next_day(current_day)
+        self._season_file = SeasonFile.open(get_json_file_path(self.metadata.year))
+
+    @classmethod
+    def load(cls, year: int, quiet: bool, fetcher: Optional[StandingsFetcher] = None) -> Optional[MlbYearStandings]:
+        """Reads the year's file once, parsing the metadata right away and the standings
+        the first time they're used."""
+        metrics = fetcher.metrics if fetcher is not None else Metrics()
+        with metrics.stage("load"):
+            season_file = SeasonFile.open(get_json_file_path(year))
+            if season_file is None:
+                return None
+            standings = cls(MlbMetadata.from_json(year, season_file.metadata_json), quiet, fetcher)
+            standings._season_file = season_file
+        return standings
 
     def populate(self):
         if len(self.all_day_data) == 0:
             # first, find opening day
-            opening_day = self._get_opening_day()
+            with self.fetcher.metrics.stage("opening_day"):
+                opening_day = self._get_opening_day()
             if not self.quiet:
                 print(f"Opening day is {opening_day}")
             self._add_before_opening_day_data(previous_day(opening_day))
-            self._get_all_data(opening_day)
+            with self.fetcher.metrics.stage("fetch"):
+                self._get_all_data(opening_day)
         else:
-            # get all data starting at last day (because it might be out of date if more games happened)
-            all_days = sorted(self.all_day_data.keys())
-            last_day = all_days[-1]
-            self._get_all_data(last_day)
+            self.update()
 
-    def write_to_json(self):
+    def update(self, window_days: Optional[int] = None, include_today: bool = False) -> Optional[datetime.date]:
+        """Refetches the last `window_days` days (UPDATE_WINDOW_DAYS by default, since they
+        might be out of date if more games happened) and gets any days after that, through
+        today if `include_today` is set. Returns the first day that changed (or was added
+        or removed), or None if nothing did."""
+        if window_days is None:
+            window_days = UPDATE_WINDOW_DAYS
+        days = self.store.days()
+        # don't refetch the day before opening day
+        first_day = days[min(len(days) - 1, max(1, len(days) - window_days))]
+        old_fingerprints = {day: self.store.fingerprint(day) for day in days if day >= first_day}
+        with self.fetcher.metrics.stage("fetch"):
+            self._get_all_data(first_day, force_update=True, include_today=include_today)
+        new_fingerprints = {day: self.store.fingerprint(day) for day in self.store.days() if day >= first_day}
+        changed_days = [day for day in old_fingerprints.keys() | new_fingerprints.keys()
+                        if old_fingerprints.get(day) != new_fingerprints.get(day)]
+        return min(changed_days) if len(changed_days) > 0 else None
+
+    def populate_from_schedule(self):
+        """Builds the whole season from one pull of the schedule instead of fetching
+        standings day by day, by adding up each team's results."""
+        year = self.metadata.year
+        with self.fetcher.metrics.stage("fetch"):
+            schedule = self.fetcher.fetch_schedule(datetime.date(year=year, month=2, day=1), datetime.date(year=year, month=11, day=30))
+            self.store = standings_from_schedule(self.team_index, schedule, datetime.date.today(), self.quiet)
+
+    def write_to_json(self, since: Optional[datetime.date] = None):
+        """Writes the whole file, or if `since` is given and the file is already there,
+        only serializes the days starting at `since` and reuses the rest of the file.
+        Either way the file is replaced atomically."""
+        with self.fetcher.metrics.stage("serialization"):
+            self._write_to_json(since)
+
+    def _write_to_json(self, since: Optional[datetime.date]):
         file_path = get_json_file_path(self.metadata.year)
+        if since is not None and self._patch_json(file_path, since):
+            return
         os.makedirs(file_path.parent, exist_ok=True)
         j = {}
         j['metadata'] = { k: {"name": self.metadata.id_to_division_info_dict[k].name,
                               "teams": self.metadata.id_to_division_info_dict[k].team_names} for k in sorted(self.metadata.id_to_division_info_dict)}
-        all_days = sorted(self.all_day_data.keys())
-        opening_day = all_days[0]
+        opening_day = self.store.days()[0]
         j['opening_day'] = opening_day.strftime("%Y/%m/%d")
-        def day_data_to_json(day_data: dict[DivisionId, list[TeamStanding]]) -> dict:
-            return {k:[[standing.wins, standing.losses] for standing in day_data[k]] for k in sorted(day_data.keys())}
-        j['standings'] = [day_data_to_json(self.all_day_data[day]) for day in all_days]
+        j['standings'] = self.store.to_json_standings()
+
+        write_file_atomically(file_path, json.dumps(j).encode('utf-8'))
+
+    def _patch_json(self, file_path: Path, since: datetime.date) -> bool:
+        # Each day is a JSON object with no nested objects, so we can find where
+        # `since` starts by counting closing braces after the start of the standings.
+        # Returns False if the file doesn't look like what we'd expect.
+        days = self.store.days()
+        opening_day = days[0]
+        if since <= opening_day:
+            return False
+        days_to_keep = len([day for day in days if day < since])
+        try:
+            with open(file_path, 'rb') as f:
+                contents = f.read()
+        except OSError:
+            return False
+        header = f'"opening_day": "{opening_day.strftime("%Y/%m/%d")}", "standings": ['.encode('utf-8')
+        position = contents.find(header)
+        if position == -1:
+            return False
+        position += len(header)
+        for _ in range(days_to_keep):
+            position = contents.find(b'}', position) + 1
+            if position == 0:
+                return False
+        new_days = [json.dumps(day_json) for day_json in self.store.to_json_standings(since=since)]
+        separator = ", " if days_to_keep > 0 and len(new_days) > 0 else ""
+        # the whole file is rewritten anyway, so it might as well be atomic
+        write_file_atomically(file_path, contents[:position] + (separator + ", ".join(new_days) + "]}").encode('utf-8'))
+        return True
+
+    def derived_series(self) -> dict:
+        """Computes the series the page plots, so it doesn't have to.
+
+        For every team: wins and losses for each day. For every chart (each division,
+        then each league and all of MLB, in the order the page shows them): the teams
+        and the leader's games above .500 each day. Games above .500 and games back are
+        one subtraction away from those, so the page works them out rather than
+        downloading them.
+
+        Days we don't have a team's record for (or any record in a chart, for the
+        leader) are null."""
+        store = self.store
+        team_index = self.team_index
+        rows = store.rows()
+        records = store.records[rows].astype(np.int32)
+        missing = records[:, :, 0] == MISSING
+        games_above_500 = records[:, :, 0] - records[:, :, 1]
+        derived : dict = {'opening_day': store.row_date(rows[0]).strftime("%Y/%m/%d") if len(rows) > 0 else None}
+        def with_nulls(values: np.ndarray, values_missing: np.ndarray) -> list[Optional[int]]:
+            return [None if is_missing else value for (value, is_missing) in zip(values.tolist(), values_missing.tolist())]
+        derived['teams'] = {team_name: {'wins': with_nulls(records[:, column, 0], missing[:, column]),
+                                        'losses': with_nulls(records[:, column, 1], missing[:, column])}
+                            for (column, team_name) in enumerate(team_index.team_names)}
+
+        def chart(title: str, division_ids: list[DivisionId]) -> dict:
+            columns = np.concatenate([np.arange(team_index.num_teams)[team_index.division_slices[division_id]] for division_id in division_ids])
+            chart_games_above_500 = np.where(missing[:, columns], np.iinfo(np.int32).min, games_above_500[:, columns])
+            leader = chart_games_above_500.max(axis=1) if len(columns) > 0 else np.zeros(len(rows), dtype=np.int32)
+            return {'title': title,
+                    'teams': [team_index.team_names[column] for column in columns],
+                    'leader_games_above_500': with_nulls(leader, missing[:, columns].all(axis=1))}
 
-        with open(file_path, 'w') as f:
-            f.write(json.dumps(j))
+        division_infos = self.metadata.id_to_division_info_dict
+        charts = []
+        def league_chart(league_name: str) -> dict:
+            return chart(league_name, [division_id for division_id in team_index.division_ids if division_infos[division_id].name.startswith(league_name)])
+        have_added_all_al = False
+        for division_id in sorted(team_index.division_ids, key=lambda division_id: get_division_name_sort_key(division_infos[division_id].name)):
+            title = division_infos[division_id].name
+            if title.startswith("National League") and not have_added_all_al:
+                # AL is first, put all AL teams here
+                have_added_all_al = True
+                charts.append(league_chart("American League"))
+            charts.append(chart(title, [division_id]))
+        charts.append(league_chart("National League"))
+        charts.append(chart("All MLB", team_index.division_ids))
+        derived['charts'] = charts
+        return derived
 
-    def _get_all_data(self, start_day: datetime.date, force_update: bool = False):
+    def write_derived_json(self):
+        with self.fetcher.metrics.stage("serialization"):
+            write_file_atomically(get_derived_json_file_path(self.metadata.year),
+                                  json.dumps(self.derived_series(), separators=(',', ':')).encode('utf-8'))
+
+    def _get_all_data(self, start_day: datetime.date, force_update: bool = False, include_today: bool = False):
+        # today's standings only have the games that are over so far, so normally stop at yesterday
+        last_day = datetime.date.today() if include_today else previous_day(datetime.date.today())
         current_day = start_day
-        previous_day_data = []
+        previous_fingerprint : Optional[int] = None
+        unchanged_days = 0
+        # days fetched ahead of current_day by the fetcher's workers
+        fetched_data : dict[datetime.date, dict] = {}
         while True:
-            if current_day >= datetime.date.today():
+            if current_day > last_day:
                 return
-            if current_day not in self.all_day_data or force_update:
-                data = get_raw_standings_data(current_day, self.quiet)
+            if current_day not in self.store or force_update:
+                if current_day not in fetched_data:
+                    fetched_data = self._fetch_days_ahead(current_day, last_day, force_update)
+                data = fetched_data.pop(current_day)
                 if not data_is_empty(data):
                     self._store_day_data(current_day, data)
                 else:
                     return
-            current_day_data = self.all_day_data[current_day]
-            # need to look back at previous 10 days of data
-            # if all the same, must be the end of the season
-            if len(previous_day_data) == 10:
-                if all([day_data_equals(current_day_data, p) for p in previous_day_data]):
-                    self._delete_copied_data_at_end(current_day)
-                    return
-            previous_day_data.append(current_day_data)
-            if len(previous_day_data) > 10:
-                previous_day_data = previous_day_data[1:]
+            # if the standings haven't changed in 10 days, must be the end of the season
+            fingerprint = self.store.fingerprint(current_day)
+            if fingerprint is not None and fingerprint == previous_fingerprint:
+                unchanged_days += 1
+            else:
+                unchanged_days = 0
+            if unchanged_days == 10:
+                self._delete_copied_data_at_end(current_day)
+                return
+            previous_fingerprint = fingerprint
             current_day = next_day(current_day)
-    
+
+    def _fetch_days_ahead(self, start_day: datetime.date, last_day: datetime.date, force_update: bool) -> dict[datetime.date, dict]:
+        # Fetch a batch of upcoming days concurrently. The caller still stores them
+        # one at a time in date order, so at the end of the season we only waste
+        # at most one batch of requests.
+        days = []
+        day = start_day
+        while len(days) < self.fetcher.batch_size and day <= last_day:
+            if day not in self.store or force_update:
+                days.append(day)
+            day = next_day(day)
+        # days we're refetching might have changed since they were cached
+        return dict(zip(days, self.fetcher.fetch_many(days, refresh=force_update)))
+
     def _delete_copied_data_at_end(self, last_day: datetime.date):
-        last_day_data = self.all_day_data[last_day]
-        next_to_last_day = previous_day(last_day)
-        next_to_last_data = self.all_day_data[next_to_last_day]
-        while day_data_equals(last_day_data, next_to_last_data):
-            del self.all_day_data[last_day]
-            last_day = next_to_last_day
-            last_day_data = self.all_day_data[last_day]
-            next_to_last_day = previous_day(last_day)
-            next_to_last_data = self.all_day_data[next_to_last_day]
+        fingerprint = self.store.fingerprint(last_day)
+        while self.store.fingerprint(previous_day(last_day)) == fingerprint:
+            self.store.delete_day(last_day)
+            last_day = previous_day(last_day)
 
     def _get_opening_day(self) -> datetime.date:
-        opening_day_attempt = get_opening_day_guess(self.metadata.year)
-        opening_day_data = get_raw_standings_data(opening_day_attempt, self.quiet)
-        if not data_is_before_opening_day(opening_day_data):
-            opening_day = self._search_backward_for_opening_day(opening_day_attempt, opening_day_data)
+        # Opening day is the first day whose data isn't from before opening day.
+        # Gallop away from the guess in steps of 1, 2, 4, ... days until we've
+        # bracketed it, then binary search the bracket.
+        year = self.metadata.year
+        fetched_data : dict[datetime.date, dict] = {}
+        def is_before_opening_day(day: datetime.date) -> bool:
+            if day not in fetched_data:
+                fetched_data[day] = self.fetcher.fetch(day)
+            return data_is_before_opening_day(fetched_data[day])
+
+        first_possible_day = datetime.date(year=year, month=1, day=1)
+        last_possible_day = min(datetime.date(year=year, month=12, day=31), datetime.date.today())
+        guess = get_opening_day_guess(year)
+        if is_before_opening_day(guess):
+            bracket = self._gallop_for_opening_day(guess, 1, last_possible_day, is_before_opening_day)
         else:
-            opening_day = self._search_forward_for_opening_day(opening_day_attempt, opening_day_data)
+            bracket = self._gallop_for_opening_day(guess, -1, first_possible_day, is_before_opening_day)
+        if bracket is None:
+            raise ValueError(f"Couldn't find opening day for {year}")
+        (before_opening_day, after_opening_day) = sorted(bracket)
+        while after_opening_day.toordinal() - before_opening_day.toordinal() > 1:
+            middle_day = datetime.date.fromordinal((before_opening_day.toordinal() + after_opening_day.toordinal()) // 2)
+            if is_before_opening_day(middle_day):
+                before_opening_day = middle_day
+            else:
+                after_opening_day = middle_day
+        opening_day = after_opening_day
+
+        # hang on to any of the season's data we fetched along the way
+        for day in sorted(fetched_data):
+            if day == opening_day or (opening_day < day < datetime.date.today()):
+                if not data_is_before_opening_day(fetched_data[day]):
+                    self._store_day_data(day, fetched_data[day])
         return opening_day
 
-    def _search_backward_for_opening_day(self, opening_day_attempt: datetime.date, opening_day_data) -> datetime.date:
-        while not data_is_before_opening_day(opening_day_data):
-            if opening_day_attempt < datetime.date.today():
-                self._store_day_data(opening_day_attempt, opening_day_data)
-            opening_day_attempt = previous_day(opening_day_attempt)
-            opening_day_data = get_raw_standings_data(opening_day_attempt, self.quiet)
-        return next_day(opening_day_attempt)
-    
-    def _search_forward_for_opening_day(self, opening_day_attempt: datetime.date, opening_day_data) -> datetime.date:
-        while data_is_before_opening_day(opening_day_data):
-            opening_day_attempt = next_day(opening_day_attempt)
-            opening_day_data = get_raw_standings_data(opening_day_attempt, self.quiet)
-        self._store_day_data(opening_day_attempt, opening_day_data)
-        return opening_day_attempt
-    
+    def _gallop_for_opening_day(self, start_day: datetime.date, direction: int, limit: datetime.date,
+                                is_before_opening_day: Callable[[datetime.date], bool]) -> Optional[tuple[datetime.date, datetime.date]]:
+        # Walks from start_day in the given direction (1 is forward, -1 is backward) until
+        # it finds a day on the other side of opening day. Returns that day and the last
+        # day checked on the same side as start_day, or None if we hit the limit first.
+        start_is_before = is_before_opening_day(start_day)
+        same_side_day = start_day
+        step = 1
+        while True:
+            ordinal = start_day.toordinal() + direction * step
+            if direction > 0:
+                ordinal = min(ordinal, limit.toordinal())
+            else:
+                ordinal = max(ordinal, limit.toordinal())
+            day = datetime.date.fromordinal(ordinal)
+            if day == start_day:
+                return None
+            if is_before_opening_day(day) != start_is_before:
+                return (same_side_day, day)
+            if day == limit:
+                return None
+            same_side_day = day
+            step *= 2
+
     def _store_day_data(self, date: datetime.date, data: dict):
-        days_stored_data : dict[DivisionId, list[TeamStanding]] = dict()
+        row = self.store.row(date)
+        if row is not None:
+            self.store.clear_row(row)
         for division_id in data:
-            division_stored_data : list[tuple[str, TeamStanding]] = list()
-            teams = data[division_id]['teams']
+            teams = data[division_id]
             all_teams = set(self.metadata.id_to_division_info_dict[division_id].team_names)
-            for team in teams:
-                division_stored_data.append((team['name'], TeamStanding(TeamId(team['team_id']), team['w'], team['l'])))
+            for team in teams['teams']:
+                self.store.set_team(date, division_id, team['name'], TeamId(team['team_id']), team['w'], team['l'])
                 all_teams.remove(team['name'])
-            for unknown_team in all_teams:
+            for unknown_team in sorted(all_teams):
                 print(f"Missing team {unknown_team} for date {date}")
-                division_stored_data.append((unknown_team, None))
-            division_stored_data.sort()
-            days_stored_data[division_id] = [x[1] for x in division_stored_data]
-        self.all_day_data[date] = days_stored_data
+        row = self.store.row(date)
+        if row is not None:
+            self.store.update_fingerprint(row)
 
     def _add_before_opening_day_data(self, date_before_opening_day: datetime.date):
-        opening_day_data = self.all_day_data[next_day(date_before_opening_day)]
-        before_opening_day_data : dict[DivisionId, list[TeamStanding]] = dict()
-        for division_id in opening_day_data:
-            division_data = [TeamStanding(x.team_id, 0, 0) for x in opening_day_data[division_id]]
-            before_opening_day_data[division_id] = division_data
-        self.all_day_data[date_before_opening_day] = before_opening_day_data
+        self.store.copy_day(next_day(date_before_opening_day), date_before_opening_day)
+        row = self.store.row(date_before_opening_day)
+        self.store.records[row][self.store.records[row] != MISSING] = 0
+        self.store.invalidate_fingerprints(row)
 
     def validate_and_fix_data(self, already_fixed_beginning=False, is_update=False) -> bool:
-        all_days = sorted(self.all_day_data.keys())
-        opening_day = all_days[0]
-        opening_day_data = self.all_day_data[opening_day]
-        for division_id in opening_day_data:
-            division_data = opening_day_data[division_id]
-            if max([ts.wins + ts.losses for ts in division_data]) > 0:
-                print(f"WARNING - opening_day {opening_day} has games played already: {division_data}")
+        report = self.validate(is_update=is_update, already_fixed_beginning=already_fixed_beginning)
+        for issue in report.issues:
+            print(issue)
+        return report.ok
+
+    def validate(self, is_update: bool = False, already_fixed_beginning: bool = False,
+                 since: Optional[datetime.date] = None) -> ValidationReport:
+        """Checks the whole season at once, fixing what it can in place.
+
+        If `since` is given, only checks the days starting then against the last
+        day before it. If the first day of games looks like it was copied from a
+        later day, we shift opening day forward once and check again."""
+        report = ValidationReport()
+        with self.fetcher.metrics.stage("validation"):
+            while True:
+                retry = self._validate_pass(report, is_update, already_fixed_beginning, since)
+                if not retry:
+                    break
+                already_fixed_beginning = True
+        self.fetcher.metrics.add("validation_fixes_total", report.fix_count)
+        self.fetcher.metrics.add("validation_warnings_total", len(report.of_severity(ValidationIssue.WARNING)))
+        self.fetcher.metrics.add("validation_errors_total", len(report.of_severity(ValidationIssue.ERROR)))
+        return report
+
+    def _validate_pass(self, report: ValidationReport, is_update: bool, already_fixed_beginning: bool,
+                       since: Optional[datetime.date]) -> bool:
+        # Returns whether we fixed the beginning of the season and need to validate again.
+        store = self.store
+        team_index = self.team_index
+        rows = store.rows()
+        if len(rows) == 0:
+            report.add(ValidationIssue.ERROR, None, None, "No standings data")
+            return False
+        check_opening_day = True
+        if since is not None:
+            # start at the last day before since
+            first_row = max(0, int(np.searchsorted(rows, since.toordinal() - store.first_day.toordinal())) - 1)
+            check_opening_day = first_row == 0
+            rows = rows[first_row:]
+        days = [store.row_date(row) for row in rows]
+        records = store.records[rows].astype(np.int32)
+        team_ids = store.team_ids[rows]
+        has_division = store.has_division[rows]
+        num_days = len(rows)
+        day_numbers = np.arange(num_days)
+
+        opening_games = np.where(records[0, :, 0] == MISSING, 0, records[0].sum(axis=-1))
+        for (division_position, division_id) in enumerate(team_index.division_ids):
+            division_slice = team_index.division_slices[division_id]
+            if check_opening_day and has_division[0, division_position] and opening_games[division_slice].max(initial=0) > 0:
+                report.add(ValidationIssue.ERROR, days[0], division_id,
+                           f"WARNING - opening_day {days[0]} has games played already: {records[0, division_slice].tolist()}")
                 return False
-        yesterday_data = opening_day_data
-        for today in all_days[1:]:
-            today_data = self.all_day_data[today]
-            for division_id in yesterday_data:
-                if division_id not in today_data:
-                    print(f"No data for division {division_id} on {today}, just going to copy from yesterday")
-                    today_data[division_id] = yesterday_data[division_id]
-            for division_id in today_data:
-                today_division_data = today_data[division_id]
-                if division_id not in yesterday_data:
-                    print(f"No data for division {division_id} the day before {today}, skipping validation")
-                    continue
-                yesterday_division_data = yesterday_data[division_id]
-                if len(today_division_data) != len(yesterday_division_data):
-                    print(f"Mismatched division size - today {today} division_id {division_id} , today_division_data {today_division_data} yesterday_division_data {yesterday_division_data}: trying to fix")
-                    if len(today_division_data) < len(yesterday_division_data):
-                        while len(today_division_data) < len(yesterday_division_data):
-                            today_division_data.append(yesterday_division_data[len(today_division_data)])
-                        print(f"Adjusted to {today_division_data}")
-                    else:
-                        print("Couldn't fix")
-                        return False
-                index = 0
-                for (today_ts, yesterday_ts) in zip(today_division_data, yesterday_division_data):
-                    if today_ts is None:
-                        print(f"Missing data for team on {today}, fixing")
-                        today_ts = TeamStanding(yesterday_ts.team_id, yesterday_ts.wins, yesterday_ts.losses)
-                        today_division_data[index] = today_ts
-                    if today_ts.team_id != yesterday_ts.team_id:
-                        if not (is_update and (yesterday_ts.team_id is None or today_ts.team_id is None)):
-                            print(f"Team IDs out of order - today {today} today_division_data {today_division_data} yesterday_division_data {yesterday_division_data}")
-                            return False
-                    game_diff = (today_ts.wins + today_ts.losses) - (yesterday_ts.wins + yesterday_ts.losses)
-                    if game_diff > 2:
-                        print(f"Jump in games played on {today} in {division_id} from {yesterday_ts} to {today_ts}! Attempting to fix.")
-                        if yesterday_ts.wins == 0 and yesterday_ts.losses == 0:
-                            if not already_fixed_beginning:
-                                print(f"Weirdness is at beginning; trying to fix")
-                                self.all_day_data[today] = self.all_day_data[previous_day(today)]
-                                del self.all_day_data[previous_day(today)]
-                                return self.validate_and_fix_data(already_fixed_beginning=True)
-                            else:
-                                print(f"Weirdness is at beginning but already tried to fix it; going to uneasily continue on")
-                        else:
-                            print(f"Nope, can't figure it out")
-                            return False
-                    if today_ts.wins < yesterday_ts.wins or today_ts.losses < yesterday_ts.losses:
-                        print(f"Wins/losses went down on {today} in {division_id} from {yesterday_ts} to {today_ts}! Attempting to fix.")
-                        if today_ts.wins - yesterday_ts.wins < -1:
-                            print(f"Can't fix - wins drop too much!")
-                            return False
-                        elif today_ts.wins - yesterday_ts.wins == -1:
-                            print(f"Resetting wins")
-                            yesterday_ts.wins = today_ts.wins
-                        if today_ts.losses - yesterday_ts.losses < -1:
-                            print(f"Can't fix - losses drop too much!")
-                            return False
-                        elif today_ts.losses - yesterday_ts.losses == -1:
-                            print(f"Resetting losses")
-                            yesterday_ts.losses = today_ts.losses
-                    index = index + 1
-            yesterday_data = today_data
+
+        # copy divisions with no data from the day before
+        for (division_position, division_id) in enumerate(team_index.division_ids):
+            present = has_division[:, division_position]
+            if not present.any():
+                continue
+            first_present = int(np.argmax(present))
+            if first_present > 0:
+                report.add(ValidationIssue.WARNING, days[first_present], division_id,
+                           f"No data for division {division_id} the day before {days[first_present]}, skipping validation")
+            source = np.maximum.accumulate(np.where(present, day_numbers, -1))
+            to_fill = ~present & (day_numbers > first_present)
+            if to_fill.any():
+                division_slice = team_index.division_slices[division_id]
+                records[to_fill, division_slice] = records[source[to_fill], division_slice]
+                team_ids[to_fill, division_slice] = team_ids[source[to_fill], division_slice]
+                has_division[to_fill, division_position] = True
+                for day_number in np.flatnonzero(to_fill):
+                    report.add(ValidationIssue.FIXED, days[day_number], division_id,
+                               f"No data for division {division_id} on {days[day_number]}, just going to copy from yesterday")
+
+        # copy teams with no data from the day before
+        team_present = has_division[:, team_index.team_division_positions]
+        missing = team_present & (records[:, :, 0] == MISSING)
+        if missing[1:].any():
+            source = np.maximum.accumulate(np.where(missing, -1, day_numbers[:, np.newaxis]), axis=0)
+            to_fill = missing & (source >= 0)
+            (fill_days, fill_teams) = np.nonzero(to_fill)
+            records[fill_days, fill_teams] = records[source[fill_days, fill_teams], fill_teams]
+            team_ids[fill_days, fill_teams] = team_ids[source[fill_days, fill_teams], fill_teams]
+            for (day_number, team) in zip(fill_days, fill_teams):
+                report.add(ValidationIssue.FIXED, days[day_number], team_index.team_divisions[team],
+                           f"Missing data for {team_index.team_names[team]} on {days[day_number]}, fixing")
+
+        # compare each day to the day before
+        yesterday = records[:-1]
+        today = records[1:]
+        compared = team_present[:-1] & team_present[1:] & (yesterday[:, :, 0] != MISSING) & (today[:, :, 0] != MISSING)
+        yesterday_ids = team_ids[:-1]
+        today_ids = team_ids[1:]
+        mismatched_ids = compared & (yesterday_ids != today_ids)
+        if is_update:
+            mismatched_ids &= (yesterday_ids != 0) & (today_ids != 0)
+        yesterday_games = yesterday.sum(axis=-1)
+        jumps = compared & (today.sum(axis=-1) - yesterday_games > 2)
+        jumps_at_beginning = jumps & (yesterday_games == 0)
+        win_changes = today[:, :, 0] - yesterday[:, :, 0]
+        loss_changes = today[:, :, 1] - yesterday[:, :, 1]
+
+        def describe(day_number: int, team: int) -> tuple[datetime.date, DivisionId, str]:
+            return (days[day_number + 1], team_index.team_divisions[team],
+                    f"on {days[day_number + 1]} in {team_index.team_divisions[team]} for {team_index.team_names[team]} from "
+                    f"{yesterday[day_number, team, 0]}-{yesterday[day_number, team, 1]} to {today[day_number, team, 0]}-{today[day_number, team, 1]}")
+
+        for (day_number, team) in zip(*np.nonzero(mismatched_ids)):
+            (day, division_id, description) = describe(day_number, team)
+            report.add(ValidationIssue.ERROR, day, division_id, f"Team IDs out of order {description}")
+        if jumps_at_beginning.any() and not already_fixed_beginning:
+            # the first day with games really has several days' worth, so
+            # push back opening day and drop that day's data
+            day_number = int(np.nonzero(jumps_at_beginning)[0].min())
+            self._write_validated_rows(rows, records, team_ids, has_division)
+            store.copy_day(days[day_number], days[day_number + 1])
+            store.delete_day(days[day_number])
+            report.add(ValidationIssue.FIXED, days[day_number + 1], None,
+                       f"Jump in games played at the beginning on {days[day_number + 1]}, moving opening day to {days[day_number + 1]}")
+            return True
+        for (day_number, team) in zip(*np.nonzero(jumps)):
+            (day, division_id, description) = describe(day_number, team)
+            if jumps_at_beginning[day_number, team]:
+                report.add(ValidationIssue.WARNING, day, division_id,
+                           f"Jump in games played at the beginning {description}, already tried to fix it; going to uneasily continue on")
+            else:
+                report.add(ValidationIssue.ERROR, day, division_id, f"Jump in games played {description}")
+        for (changes, component, name) in ((win_changes, 0, "wins"), (loss_changes, 1, "losses")):
+            for (day_number, team) in zip(*np.nonzero(compared & (changes < -1))):
+                (day, division_id, description) = describe(day_number, team)
+                report.add(ValidationIssue.ERROR, day, division_id, f"Can't fix - {name} drop too much {description}")
+            to_reset = compared & (changes == -1)
+            for (day_number, team) in zip(*np.nonzero(to_reset)):
+                (day, division_id, description) = describe(day_number, team)
+                report.add(ValidationIssue.FIXED, day, division_id, f"Resetting {name}, they went down {description}")
+            yesterday[:, :, component][to_reset] = today[:, :, component][to_reset]
+        self._write_validated_rows(rows, records, team_ids, has_division)
+
         if self.metadata.year != datetime.date.today().year:
-            last_day_data = self.all_day_data[all_days[-1]]
-            total_games = [[ts.wins + ts.losses for ts in last_day_data[division_id]] for division_id in last_day_data]
-            flattened_total_games = [item for sublist in total_games for item in sublist]
+            last_day_games = records[-1].sum(axis=-1)[team_present[-1] & (records[-1, :, 0] != MISSING)]
             # can be game 163 for tiebreaker, etc.
-            if max(flattened_total_games) - min(flattened_total_games) > 2:
-                print(f"Mismatched number of games played! {flattened_total_games}")
-                return False
-        return True
+            if len(last_day_games) > 0 and last_day_games.max() - last_day_games.min() > 2:
+                report.add(ValidationIssue.ERROR, days[-1], None, f"Mismatched number of games played! {last_day_games.tolist()}")
+        return False
+
+    def _write_validated_rows(self, rows: np.ndarray, records: np.ndarray, team_ids: np.ndarray, has_division: np.ndarray):
+        self.store.records[rows] = records
+        self.store.team_ids[rows] = team_ids
+        self.store.has_division[rows] = has_division
+        self.store.invalidate_fingerprints(rows)
 
     def __str__(self):
         s = f"{self.metadata}\n\n"
@@ -362,14 +1245,620 @@ class MlbYearStandings:
         return str(self)
 
 
+class Metrics:
+    """Timings and counts for one run, so we can tell where the time went.
+
+    `stages` is seconds spent in each stage (added up if a stage runs more than once),
+    `counters` are totals, and `latencies` is the count, total and max seconds of each
+    kind of request. Safe to share between threads."""
+    PROMETHEUS_PREFIX = "getmlbstandings"
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.stages : dict[str, float] = dict()
+        self.counters : dict[str, float] = dict()
+        self.latencies : dict[str, dict[str, float]] = dict()
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - start
+            with self.lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def add(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        """Sets a gauge (it's kept with the counters, but isn't added to)."""
+        with self.lock:
+            self.counters[name] = value
+
+    def observe(self, kind: str, seconds: float):
+        with self.lock:
+            latency = self.latencies.setdefault(kind, {'count': 0, 'sum': 0.0, 'max': 0.0})
+            latency['count'] += 1
+            latency['sum'] += seconds
+            latency['max'] = max(latency['max'], seconds)
+
+    def merge(self, j: dict):
+        """Adds in metrics from to_json(), like the ones from each year of a batch."""
+        with self.lock:
+            for (name, seconds) in j['stages'].items():
+                self.stages[name] = self.stages.get(name, 0.0) + seconds
+            for (name, value) in j['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for (kind, other) in j['latencies'].items():
+                latency = self.latencies.setdefault(kind, {'count': 0, 'sum': 0.0, 'max': 0.0})
+                latency['count'] += other['count']
+                latency['sum'] += other['sum']
+                latency['max'] = max(latency['max'], other['max'])
+
+    def to_json(self) -> dict:
+        with self.lock:
+            return {'stages': dict(self.stages), 'counters': dict(self.counters),
+                    'latencies': {kind: dict(latency) for (kind, latency) in self.latencies.items()}}
+
+    @staticmethod
+    def _format_prometheus_value(value: float) -> str:
+        # exactly, so big counters don't get rounded off like they would with :g
+        return str(int(value)) if isinstance(value, (int, np.integer)) else repr(float(value))
+
+    def to_prometheus(self, timestamp: Optional[float] = None) -> str:
+        """In the text format node_exporter's textfile collector reads."""
+        prefix = self.PROMETHEUS_PREFIX
+        j = self.to_json()
+        lines = [f"# TYPE {prefix}_stage_seconds gauge"]
+        lines.extend(f'{prefix}_stage_seconds{{stage="{name}"}} {seconds:.6f}' for (name, seconds) in sorted(j['stages'].items()))
+        for (name, value) in sorted(j['counters'].items()):
+            lines.append(f"# TYPE {prefix}_{name} {'counter' if name.endswith('_total') else 'gauge'}")
+            lines.append(f"{prefix}_{name} {self._format_prometheus_value(value)}")
+        for statistic in ('count', 'sum', 'max'):
+            lines.append(f"# TYPE {prefix}_request_seconds_{statistic} gauge")
+            for (kind, latency) in sorted(j['latencies'].items()):
+                value = self._format_prometheus_value(latency[statistic]) if statistic == 'count' else f"{latency[statistic]:.6g}"
+                lines.append(f'{prefix}_request_seconds_{statistic}{{kind="{kind}"}} {value}')
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {timestamp if timestamp is not None else time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_path: Path):
+        """Writes a Prometheus textfile if file_path ends in .prom, otherwise JSON."""
+        if file_path.suffix == ".prom":
+            contents = self.to_prometheus().encode('utf-8')
+        else:
+            contents = json.dumps(self.to_json(), indent=2).encode('utf-8')
+        write_file_atomically(file_path, contents)
+
+class RateLimiter:
+    """Token bucket shared by everything that talks to the StatsAPI.
+
+    Allows bursts of up to `burst` requests, refilling at `rate` requests per second.
+    Safe to share between threads."""
+    def __init__(self, rate: float, burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.last_refill = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Blocks until a request is allowed. Returns the number of seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(float(self.burst), self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+class SharedRateLimiter(RateLimiter):
+    """A RateLimiter whose state lives in shared memory, so worker processes
+    can share one limit. Hand it to the workers when they're started."""
+    def __init__(self, rate: float, burst: int = 1):
+        import multiprocessing
+        self.shared_state = multiprocessing.Array('d', [float(burst), time.monotonic()])
+        super().__init__(rate, burst)
+        self.lock = self.shared_state.get_lock()
+
+    @property
+    def tokens(self) -> float:
+        return self.shared_state[0]
+
+    @tokens.setter
+    def tokens(self, value: float):
+        self.shared_state[0] = value
+
+    @property
+    def last_refill(self) -> float:
+        return self.shared_state[1]
+
+    @last_refill.setter
+    def last_refill(self, value: float):
+        self.shared_state[1] = value
+
+LEAGUE_IDS = "103,104"
+# how many of the most recent days to refetch when updating, since
+# late games and suspended games can change them
+UPDATE_WINDOW_DAYS = 3
+# roughly what the old fixed 0.3 second sleep allowed, but without
+# paying for it on top of every request's latency
+DEFAULT_RATE_LIMITER = RateLimiter(rate=3.0, burst=3)
+
+CACHE_PATH = Path(os.path.realpath(__file__)).parent / "cache"
+
+class CacheMissError(Exception):
+    pass
+
+class ResponseCache:
+    """On-disk cache of raw standings responses, keyed by date and league ids.
+
+    Responses from past seasons never change, so they never expire. Responses from
+    the current season expire after `max_age` seconds. Once the cache is bigger than
+    `max_bytes` the least recently used entries are evicted.
+
+    In replay mode expired entries are still served and a miss raises CacheMissError
+    instead of going to the network."""
+    def __init__(self, path: Path = CACHE_PATH, max_age: float = 6 * 60 * 60,
+                 max_bytes: int = 200 * 1024 * 1024, replay: bool = False,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.total_bytes : Optional[int] = None
+
+    def _entry_path(self, date: datetime.date, league_ids: str) -> Path:
+        return self.path / str(date.year) / f"{date.isoformat()}_{league_ids.replace(',', '-')}.json"
+
+    def is_immutable(self, date: datetime.date) -> bool:
+        return date.year < datetime.date.today().year
+
+    def get(self, date: datetime.date, league_ids: str) -> Optional[dict]:
+        entry_path = self._entry_path(date, league_ids)
+        try:
+            with open(entry_path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        # decided now rather than when it was stored, so this season's entries stop expiring once it's over
+        if not self.is_immutable(date) and not self.replay and self.clock() - entry['fetched_at'] > self.max_age:
+            return None
+        try:
+            # mark as recently used for eviction
+            os.utime(entry_path)
+        except OSError:
+            pass
+        # JSON turned the division ids into strings
+        return {DivisionId(int(division_id)): division_data for (division_id, division_data) in entry['data'].items()}
+
+    def put(self, date: datetime.date, league_ids: str, data: dict):
+        entry_path = self._entry_path(date, league_ids)
+        os.makedirs(entry_path.parent, exist_ok=True)
+        contents = json.dumps({'fetched_at': self.clock(), 'data': data})
+        temp_path = entry_path.with_name(f"{entry_path.name}.{threading.get_ident()}.tmp")
+        with open(temp_path, 'w') as f:
+            f.write(contents)
+        with self.lock:
+            old_size = entry_path.stat().st_size if entry_path.exists() else 0
+            os.replace(temp_path, entry_path)
+            self._add_bytes(len(contents) - old_size)
+
+    def _entry_paths(self) -> list[Path]:
+        if not self.path.exists():
+            return []
+        return list(self.path.glob("*/*.json"))
+
+    def _add_bytes(self, size: int):
+        if self.total_bytes is None:
+            self.total_bytes = sum(p.stat().st_size for p in self._entry_paths())
+        else:
+            self.total_bytes += size
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # evict down to 90% so we don't have to do this on every put
+        target = self.max_bytes * 0.9
+        entries = [(p.stat().st_mtime, p.stat().st_size, p) for p in self._entry_paths()]
+        entries.sort()
+        for (_, size, entry_path) in entries:
+            if self.total_bytes <= target:
+                break
+            entry_path.unlink()
+            self.total_bytes -= size
+
+def statsapi_standings_source(leagueId: str, date: str) -> dict:
+    import statsapi
+    return statsapi.standings_data(leagueId=leagueId, date=date)
+
+SCHEDULE_FIELDS = "dates,date,games,gamePk,gameType,gameDate,status,detailedState,teams,away,home,team,name,isWinner"
+
+def statsapi_schedule_source(startDate: str, endDate: str) -> dict:
+    import statsapi
+    return statsapi.get("schedule", {
+        "sportId": 1,
+        "gameTypes": "R",
+        "startDate": startDate,
+        "endDate": endDate,
+        "fields": SCHEDULE_FIELDS,
+    })
+
+STATSAPI_BASE_URL = "https://statsapi.mlb.com/api/v1"
+
+def standings_data_from_response(response: dict) -> dict:
+    """Turns a raw standings endpoint response into what statsapi.standings_data
+    returns, keeping only the fields we use."""
+    divisions : dict = {}
+    for record in response.get('records', []):
+        for team_record in record['teamRecords']:
+            division = team_record['team']['division']
+            if division['id'] not in divisions:
+                divisions[division['id']] = {'div_name': division['name'], 'teams': []}
+            divisions[division['id']]['teams'].append({'name': team_record['team']['name'], 'team_id': team_record['team']['id'],
+                                                       'w': team_record['wins'], 'l': team_record['losses']})
+    return divisions
+
+class StatsApiSession:
+    """Standings and schedule sources that make their requests on one requests.Session,
+    so a long-running process reuses its connection instead of opening a new one
+    for every request like statsapi does."""
+    def __init__(self, session: Optional['requests.Session'] = None, timeout: float = 30.0):
+        if session is None:
+            import requests
+            session = requests.Session()
+        self.session = session
+        self.timeout = timeout
+
+    def _get(self, endpoint: str, params: dict) -> dict:
+        response = self.session.get(f"{STATSAPI_BASE_URL}/{endpoint}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def standings_data(self, leagueId: str, date: str) -> dict:
+        return standings_data_from_response(self._get("standings", {
+            "leagueId": leagueId,
+            "date": date,
+            "season": date[-4:],
+            "standingsTypes": "regularSeason",
+            "hydrate": "team(division)",
+            "fields": "records,teamRecords,team,name,division,id,wins,losses",
+        }))
+
+    def schedule(self, startDate: str, endDate: str) -> dict:
+        return self._get("schedule", {
+            "sportId": 1,
+            "gameTypes": "R",
+            "startDate": startDate,
+            "endDate": endDate,
+            "fields": SCHEDULE_FIELDS,
+        })
+
+class StandingsFetcher:
+    """Fetches raw standings data, using a pool of worker threads behind a rate limiter.
+
+    `standings_source` has the same signature as statsapi.standings_data and
+    `schedule_source` returns the raw schedule endpoint response, so tests can
+    pass in local fakes. If there's a `cache` it's checked before fetching standings,
+    unless we're refreshing days that might have changed."""
+    def __init__(self, quiet: bool, workers: int = 4, rate_limiter: Optional[RateLimiter] = None,
+                 standings_source: Callable[..., dict] = statsapi_standings_source,
+                 retries: int = 3, backoff: float = 1.0, sleep: Callable[[float], None] = time.sleep,
+                 cache: Optional[ResponseCache] = None,
+                 schedule_source: Callable[..., dict] = statsapi_schedule_source,
+                 metrics: Optional[Metrics] = None):
+        self.quiet = quiet
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.workers = workers
+        self.batch_size = max(1, workers * 2)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else DEFAULT_RATE_LIMITER
+        self.standings_source = standings_source
+        self.schedule_source = schedule_source
+        self.request_count = 0
+        self.request_count_lock = threading.Lock()
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+
+    def fetch(self, date: datetime.date, refresh: bool = False) -> dict:
+        """With `refresh`, always goes to the network (except in replay mode), but still caches what it gets."""
+        date_str = date.strftime('%m/%d/%Y')
+        if self.cache is not None and (not refresh or self.cache.replay):
+            cached = self.cache.get(date, LEAGUE_IDS)
+            if cached is not None:
+                self.metrics.add("cache_hits_total")
+                return cached
+            self.metrics.add("cache_misses_total")
+            if self.cache.replay:
+                raise CacheMissError(f"No cached standings for {date_str} in replay mode")
+        if not self.quiet:
+            print(f"getting for {date_str}")
+        standings : dict = self._request("standings", f"standings for {date_str}", lambda: self.standings_source(leagueId=LEAGUE_IDS, date=date_str))
+        if self.cache is not None:
+            self.cache.put(date, LEAGUE_IDS, standings)
+        return standings
+
+    def fetch_schedule(self, start_day: datetime.date, end_day: datetime.date) -> dict:
+        """Gets the raw regular season schedule (with results) for a range of days in one request."""
+        start_str = start_day.strftime('%m/%d/%Y')
+        end_str = end_day.strftime('%m/%d/%Y')
+        if not self.quiet:
+            print(f"getting schedule for {start_str} - {end_str}")
+        return self._request("schedule", f"schedule for {start_str} - {end_str}", lambda: self.schedule_source(startDate=start_str, endDate=end_str))
+
+    def _request(self, kind: str, description: str, request: Callable[[], dict]) -> dict:
+        attempt = 0
+        while True:
+            self.metrics.add("throttle_seconds_total", self.rate_limiter.acquire())
+            with self.request_count_lock:
+                self.request_count += 1
+            self.metrics.add("requests_total")
+            start = time.perf_counter()
+            try:
+                response = request()
+                self.metrics.observe(kind, time.perf_counter() - start)
+                return response
+            except Exception as e:
+                self.metrics.add("request_errors_total")
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                print(f"Error getting {description}: {e}, retrying in {delay} seconds")
+                self.sleep(delay)
+                self.metrics.add("retry_seconds_total", delay)
+                attempt += 1
+
+    def fetch_many(self, dates: list[datetime.date], refresh: bool = False) -> list[dict]:
+        """Fetches all of the dates, returning the results in the same order."""
+        if self.workers <= 1 or len(dates) <= 1:
+            return [self.fetch(date, refresh) for date in dates]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(lambda date: self.fetch(date, refresh), dates))
+
+class YearResult:
+    def __init__(self, year: int, status: str, days: int = 0, requests: int = 0, fixes: int = 0, seconds: float = 0.0,
+                 metrics: Optional[dict] = None):
+        self.year = year
+        self.status = status
+        self.days = days
+        self.requests = requests
+        self.fixes = fixes
+        self.seconds = seconds
+        # Metrics.to_json() for the year
+        self.metrics = metrics
+
+    def __str__(self):
+        return f"{self.year:<6}{self.status:<24}{self.days:>6}{self.requests:>10}{self.fixes:>7}{self.seconds:>9.1f}"
+
+    def __repr__(self):
+        return str(self)
+
+def format_year_results(results: list[YearResult]) -> str:
+    lines = [f"{'Year':<6}{'Status':<24}{'Days':>6}{'Requests':>10}{'Fixes':>7}{'Seconds':>9}"]
+    lines.extend(str(result) for result in sorted(results, key=lambda result: result.year))
+    return "\n".join(lines)
+
+def rebuild_year(year: int, force: bool = False, from_schedule: bool = False, cache: Optional[ResponseCache] = None,
+                 fetcher: Optional[StandingsFetcher] = None) -> YearResult:
+    """Rebuilds one season's file, unless it's from a past season and already validates
+    (or if `force` is set). The current season gets updated instead of rebuilt."""
+    start_time = time.perf_counter()
+    if fetcher is None:
+        fetcher = StandingsFetcher(quiet=True, rate_limiter=_batch_rate_limiter, cache=cache if cache is not None else _batch_cache)
+    def result(status: str, standings: Optional[MlbYearStandings], fixes: int = 0) -> YearResult:
+        return YearResult(year, status, len(standings.store) if standings is not None else 0,
+                          fetcher.request_count, fixes, time.perf_counter() - start_time, fetcher.metrics.to_json())
+    try:
+        standings = None if force else MlbYearStandings.load(year, quiet=True, fetcher=fetcher)
+        if standings is not None:
+            if year < datetime.date.today().year:
+                if standings.validate().ok:
+                    derived_file_path = get_derived_json_file_path(year)
+                    if not derived_file_path.exists() or derived_file_path.stat().st_mtime < get_json_file_path(year).stat().st_mtime:
+                        standings.write_derived_json()
+                    return result("skipped", standings)
+                standings = None
+            else:
+                update_start = standings.update()
+                if update_start is None:
+                    return result("unchanged", standings)
+                report = standings.validate(is_update=True, since=update_start)
+                standings.write_to_json(since=previous_day(update_start))
+                standings.write_derived_json()
+                return result("updated" if report.ok else "updated (invalid)", standings, report.fix_count)
+        metadata = MlbMetadata.get_metadata(year, quiet=True, fetcher=fetcher)
+        standings = MlbYearStandings(metadata, quiet=True, fetcher=fetcher)
+        if from_schedule:
+            standings.populate_from_schedule()
+        else:
+            standings.populate()
+        report = standings.validate()
+        standings.write_to_json()
+        standings.write_derived_json()
+        return result("rebuilt" if report.ok else "rebuilt (invalid)", standings, report.fix_count)
+    except Exception as e:
+        print(f"Error rebuilding {year}: {e}")
+        return result(f"error: {type(e).__name__}", None)
+
+# set in each batch worker process so they all share one rate limit
+_batch_rate_limiter : Optional[RateLimiter] = None
+_batch_cache : Optional[ResponseCache] = None
+
+def _init_batch_worker(rate_limiter: RateLimiter, use_cache: bool, replay: bool):
+    global _batch_rate_limiter, _batch_cache
+    _batch_rate_limiter = rate_limiter
+    _batch_cache = ResponseCache(replay=replay) if use_cache or replay else None
+
+def rebuild_years(years: list[int], processes: int = 4, rate_limiter: Optional[SharedRateLimiter] = None,
+                  force: bool = False, from_schedule: bool = False, use_cache: bool = True, replay: bool = False) -> list[YearResult]:
+    """Rebuilds several seasons in a pool of processes that share one rate limit."""
+    from concurrent.futures import ProcessPoolExecutor
+    if rate_limiter is None:
+        rate_limiter = SharedRateLimiter(rate=DEFAULT_RATE_LIMITER.rate, burst=DEFAULT_RATE_LIMITER.burst)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_batch_worker,
+                             initargs=(rate_limiter, use_cache, replay)) as executor:
+        futures = [executor.submit(rebuild_year, year, force, from_schedule) for year in years]
+        return [future.result() for future in futures]
+
+# how long the daemon waits between polls
+GAME_WINDOW_POLL_SECONDS = 5 * 60
+OFF_DAY_POLL_SECONDS = 3 * 60 * 60
+OFFSEASON_POLL_SECONDS = 24 * 60 * 60
+# when a game might end relative to when it starts, so we poll often in between
+EARLIEST_GAME_END = datetime.timedelta(hours=2)
+LATEST_GAME_END = datetime.timedelta(hours=5)
+# how many days of the schedule to look at, to tell off days from the offseason
+SCHEDULE_LOOKAHEAD_DAYS = 7
+
+def run_playoff_odds(year: int) -> bool:
+    """Updates the year's playoff odds in another process, since playoffodds imports this module
+    (which can't import it back when it's run as a script). Returns whether it worked."""
+    repo_path = Path(os.path.realpath(__file__)).parent.parent
+    return subprocess.run([sys.executable, "-m", "getmlbstandings.playoffodds", str(year)], cwd=repo_path).returncode == 0
+
+class StandingsDaemon:
+    """Keeps the current season in memory and updates it whenever there might be new
+    results, instead of starting from scratch every cron tick.
+
+    Polls every few minutes while games might be ending (based on today's schedule,
+    which it gets once a day), and rarely on off days and in the offseason. Today's
+    standings are included, so results show up as soon as games end. The season
+    file is only rewritten (atomically) when a day's fingerprint changes, and then the
+    playoff odds are updated too if there's a `playoff_odds` (like run_playoff_odds)."""
+    def __init__(self, fetcher: StandingsFetcher, year: Optional[int] = None, publish_path: Optional[Path] = None,
+                 compact: bool = False, metrics_path: Optional[Path] = None,
+                 now: Callable[[], datetime.datetime] = datetime.datetime.now, sleep: Callable[[float], None] = time.sleep,
+                 playoff_odds: Optional[Callable[[int], bool]] = None):
+        self.fetcher = fetcher
+        self.playoff_odds = playoff_odds
+        # None follows the current year
+        self.year = year
+        self.publish_path = publish_path
+        self.compact = compact
+        self.metrics_path = metrics_path
+        self.now = now
+        self.sleep = sleep
+        self.standings : Optional[MlbYearStandings] = None
+        self.schedule_date : Optional[datetime.date] = None
+        # local start times of the regular season games from yesterday through the lookahead
+        self.game_starts : list[datetime.datetime] = []
+
+    def tick(self) -> bool:
+        """Fetches whatever's new and writes it out if anything changed. Returns whether it did."""
+        self.fetcher.metrics.add("daemon_ticks_total")
+        today = self.now().date()
+        if self.schedule_date != today:
+            self._refresh_schedule(today)
+        year = self.year if self.year is not None else today.year
+        if self.standings is None or self.standings.metadata.year != year:
+            standings = MlbYearStandings.load(year, quiet=True, fetcher=self.fetcher)
+            if standings is None and not self._season_started(year):
+                # nothing to get until opening day, and the schedule will tell us when that is
+                return False
+            if standings is None:
+                metadata = MlbMetadata.get_metadata(year, quiet=True, fetcher=self.fetcher)
+                standings = MlbYearStandings(metadata, quiet=True, fetcher=self.fetcher)
+                standings.populate()
+                standings.validate()
+                self.standings = standings
+                self._write()
+                return True
+            self.standings = standings
+        # the day before today might not have been final last time
+        update_start = self.standings.update(window_days=2, include_today=True)
+        if update_start is None:
+            return False
+        report = self.standings.validate(is_update=True, since=update_start)
+        for issue in report.issues:
+            print(issue)
+        self._write()
+        return True
+
+    def _season_started(self, year: int) -> bool:
+        """Whether a game of the year's season might be over. Past seasons always have."""
+        now = self.now()
+        if year < now.year:
+            return True
+        return any(start.year == year and start + EARLIEST_GAME_END <= now for start in self.game_starts)
+
+    def _write(self):
+        self.fetcher.metrics.add("daemon_writes_total")
+        # the whole file, so it's replaced atomically
+        self.standings.write_to_json()
+        self.standings.write_derived_json()
+        year = self.standings.metadata.year
+        if self.compact:
+            write_compact_json_file(year)
+        if self.publish_path is not None:
+            with self.fetcher.metrics.stage("publish"):
+                publish_json_file(year, self.publish_path)
+        if self.playoff_odds is not None:
+            with self.fetcher.metrics.stage("playoff_odds"):
+                if not self.playoff_odds(year):
+                    self.fetcher.metrics.add("playoff_odds_errors_total")
+
+    def _refresh_schedule(self, today: datetime.date):
+        schedule = self.fetcher.fetch_schedule(previous_day(today), today + datetime.timedelta(days=SCHEDULE_LOOKAHEAD_DAYS))
+        self.game_starts = sorted(get_game_starts(schedule))
+        self.schedule_date = today
+
+    def next_poll_seconds(self) -> float:
+        now = self.now()
+        if any(start + EARLIEST_GAME_END <= now <= start + LATEST_GAME_END for start in self.game_starts):
+            return GAME_WINDOW_POLL_SECONDS
+        # sleep until a game might be over, or we should look at the schedule again
+        upcoming_ends = [start + EARLIEST_GAME_END for start in self.game_starts if start + EARLIEST_GAME_END > now]
+        if len(upcoming_ends) == 0:
+            return OFFSEASON_POLL_SECONDS
+        return max(GAME_WINDOW_POLL_SECONDS, min(OFF_DAY_POLL_SECONDS, (upcoming_ends[0] - now).total_seconds()))
+
+    def run(self, max_ticks: Optional[int] = None):
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            try:
+                if self.tick():
+                    print(f"{self.now():%Y-%m-%d %H:%M} updated standings")
+            except Exception as e:
+                # try again next time
+                self.fetcher.metrics.add("daemon_errors_total")
+                print(f"{self.now():%Y-%m-%d %H:%M} error updating standings: {e}")
+            ticks += 1
+            poll_seconds = self.next_poll_seconds()
+            if self.metrics_path is not None:
+                self.fetcher.metrics.set("next_poll_seconds", poll_seconds)
+                self.fetcher.metrics.write(self.metrics_path)
+            if max_ticks is None or ticks < max_ticks:
+                self.sleep(poll_seconds)
+
+def get_game_starts(schedule: dict) -> list[datetime.datetime]:
+    """The local start times of the regular season games in a raw schedule endpoint response."""
+    starts = []
+    for date_json in schedule.get('dates', []):
+        for game in date_json['games']:
+            if game.get('gameType', 'R') != 'R' or 'gameDate' not in game:
+                continue
+            start = datetime.datetime.fromisoformat(game['gameDate'].replace('Z', '+00:00'))
+            starts.append(start.astimezone().replace(tzinfo=None))
+    return starts
+
 def get_raw_standings_data(date: datetime.date, quiet: bool) -> dict:
-    date_str = date.strftime('%m/%d/%Y')
-    if not quiet:
-        print(f"getting for {date_str}")
-    # throttle
-    time.sleep(0.3)
-    standings : dict = statsapi.standings_data(leagueId="103,104", date=date_str)
-    return standings
+    return StandingsFetcher(quiet, workers=1).fetch(date)
 
 #standings = statsapi.standings_data(leagueId="103,104", date="06/19/2021")
 #print(standings)
@@ -384,30 +1873,122 @@ def get_raw_standings_data(date: datetime.date, quiet: bool) -> dict:
 if __name__ == '__main__':
     year = datetime.date.today().year
     update = False
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '-u':
+    # --no-cache always goes to the network, --replay never does
+    use_cache = '--no-cache' not in sys.argv
+    replay = '--replay' in sys.argv
+    # --schedule builds the season from the schedule instead of daily standings
+    from_schedule = '--schedule' in sys.argv
+    # --force rebuilds years in a batch even if they already validate
+    force = '--force' in sys.argv
+    # --compact also writes the compact version of the file
+    compact = '--compact' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ('--no-cache', '--replay', '--schedule', '--force', '--compact')]
+    # --publish <dir> publishes the year's file there (and updates its manifest.json) when we're done
+    publish_path = None
+    if '--publish' in args:
+        publish_index = args.index('--publish')
+        publish_path = Path(args[publish_index + 1])
+        del args[publish_index:publish_index + 2]
+    # --metrics <file> writes timings and counts there when we're done (a Prometheus textfile if it ends in .prom)
+    metrics_path = None
+    if '--metrics' in args:
+        metrics_index = args.index('--metrics')
+        metrics_path = Path(args[metrics_index + 1])
+        del args[metrics_index:metrics_index + 2]
+    metrics = Metrics()
+    run_start = time.perf_counter()
+    # -j <processes> for batches
+    processes = 4
+    if '-j' in args:
+        processes_index = args.index('-j')
+        processes = int(args[processes_index + 1])
+        del args[processes_index:processes_index + 2]
+    if len(args) > 0 and args[0] == '--daemon':
+        # --daemon [year] keeps running, updating the season as games end
+        session = StatsApiSession()
+        fetcher = StandingsFetcher(quiet=True, standings_source=session.standings_data, schedule_source=session.schedule, metrics=metrics)
+        daemon = StandingsDaemon(fetcher, year=int(args[1]) if len(args) > 1 else None, publish_path=publish_path,
+                                 compact=compact, metrics_path=metrics_path, playoff_odds=run_playoff_odds)
+        daemon.run()
+        sys.exit(0)
+    if len(args) > 0 and args[0] == '-b':
+        # -b <first year> <last year> rebuilds a range of years
+        first_year = int(args[1])
+        last_year = int(args[2]) if len(args) > 2 else first_year
+        results = rebuild_years(list(range(first_year, last_year + 1)), processes=processes, force=force,
+                                from_schedule=from_schedule, use_cache=use_cache, replay=replay)
+        print(format_year_results(results))
+        if compact:
+            for result in results:
+                if get_json_file_path(result.year).exists():
+                    write_compact_json_file(result.year)
+        if publish_path is not None:
+            with metrics.stage("publish"):
+                for result in results:
+                    if not result.status.startswith("error"):
+                        publish_json_file(result.year, publish_path)
+        if metrics_path is not None:
+            for result in results:
+                if result.metrics is not None:
+                    metrics.merge(result.metrics)
+            metrics.stages["total"] = time.perf_counter() - run_start
+            metrics.set("years_failed", len([result for result in results if result.status.startswith("error")]))
+            metrics.write(metrics_path)
+        sys.exit(0 if all(not result.status.startswith("error") for result in results) else 1)
+    if len(args) > 0:
+        if args[0] == '-u':
             update = True
-            if len(sys.argv) > 2:
-                year = int(sys.argv[2])
+            if len(args) > 1:
+                year = int(args[1])
         else:
-            year = int(sys.argv[1])
+            year = int(args[0])
+    cache = ResponseCache(replay=replay) if use_cache or replay else None
+    fetcher = StandingsFetcher(quiet=update, cache=cache, metrics=metrics)
     import pprint
     pp = pprint.PrettyPrinter(indent=2)
-    m = None
+    s = None
     if update:
-        m = MlbMetadata.load_from_file(year)
-    #pp.pprint(m)
-    if m is None:
+        s = MlbYearStandings.load(year, quiet=update, fetcher=fetcher)
+    if s is None:
         update = False
-        m = MlbMetadata.get_metadata(year, quiet=update)
-    #sys.exit(1)
-    s = MlbYearStandings(m, quiet=update)
+        m = MlbMetadata.get_metadata(year, quiet=update, fetcher=fetcher)
+        #pp.pprint(m)
+        s = MlbYearStandings(m, quiet=update, fetcher=fetcher)
+    changed = True
     if update:
-        s.load_from_file()
-    s.populate()
-    validated = s.validate_and_fix_data(is_update=update)
+        # only validate and rewrite the days that changed
+        update_start = s.update()
+        changed = update_start is not None
+        validated = True
+        if changed:
+            report = s.validate(is_update=True, since=update_start)
+            for issue in report.issues:
+                print(issue)
+            validated = report.ok
+    else:
+        if from_schedule:
+            s.populate_from_schedule()
+        else:
+            s.populate()
+        validated = s.validate_and_fix_data()
     if not validated:
         print("--------------")
         print("FAILED to validate data, writing anyway")
-    s.write_to_json()
+    if changed:
+        if update:
+            # validation might have fixed the day before update_start
+            s.write_to_json(since=previous_day(update_start))
+        else:
+            s.write_to_json()
+        s.write_derived_json()
+        if compact:
+            write_compact_json_file(year)
+    if publish_path is not None:
+        with metrics.stage("publish"):
+            publish_json_file(year, publish_path)
+    if metrics_path is not None:
+        metrics.stages["total"] = time.perf_counter() - run_start
+        metrics.set("validation_ok", int(validated))
+        metrics.set("changed", int(changed))
+        metrics.write(metrics_path)
     #pp.pprint(s)
@@ -0,0 +1,250 @@
+from __future__ import annotations
+import datetime
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from getmlbstandings.getmlbstandings import MISSING, MlbYearStandings, TeamIndex, get_content_hash, get_json_file_path, write_file_atomically
+
+# Playoff odds for every day of a season, by simulating the rest of the season many times.
+#
+#   python -m getmlbstandings.playoffodds [first year [last year]] [-n simulations] [-j processes] [--force]
+#
+# A year is skipped if its odds were already simulated from the same standings, unless --force is given.
+#
+# We don't store the schedule, so each team's remaining games are simulated independently,
+# winning each with its winning percentage regressed towards .500.
+
+DEFAULT_SIMULATIONS = 10000
+# games of .500 ball to add to a team's record when guessing how good it is
+REGRESSION_GAMES = 70
+# how many days each process simulates at a time
+DAYS_PER_TASK = 16
+
+def get_odds_json_file_path(year: int) -> Path:
+    return get_json_file_path(year).parent / "odds" / f"{year}.json"
+
+def get_standings_hash(year: int) -> str:
+    """Identifies the season file the odds are simulated from."""
+    with open(get_json_file_path(year), 'rb') as f:
+        return get_content_hash(f.read())
+
+def odds_are_current(year: int, simulations: int) -> bool:
+    """Whether the year's odds file was simulated from the season file as it is now."""
+    try:
+        with open(get_odds_json_file_path(year), 'r') as f:
+            odds = json.load(f)
+        return odds.get('standings_hash') == get_standings_hash(year) and odds.get('simulations') == simulations
+    except (OSError, json.JSONDecodeError):
+        return False
+
+def get_season_length(year: int) -> int:
+    if year == 1995:
+        return 144
+    if year == 2020:
+        return 60
+    return 162
+
+def get_playoff_format(year: int) -> tuple[bool, int]:
+    """Returns whether division runners-up make the playoffs and how many wild cards
+    each league gets, after the division winners (who are seeded first)."""
+    if year == 2020:
+        return (True, 2)
+    if year >= 2022:
+        return (False, 3)
+    if year >= 2012:
+        return (False, 2)
+    return (False, 1)
+
+def get_leagues(standings: MlbYearStandings) -> list[list[int]]:
+    """Each league's divisions, as positions in the team index's division_ids."""
+    division_infos = standings.metadata.id_to_division_info_dict
+    division_ids = standings.team_index.division_ids
+    return [[position for (position, division_id) in enumerate(division_ids) if division_infos[division_id].name.startswith(league_name)]
+            for league_name in ("American League", "National League")]
+
+# a magic number for a team that's been eliminated, an elimination number for a team
+# that's clinched, or either one for a day the team has no record; written as null
+NO_NUMBER = -1
+
+def magic_numbers(records: np.ndarray, team_index: TeamIndex, season_length: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns each team's magic number to clinch its division and its elimination number
+    from the division for each day, as [day, team] arrays. 0 means clinched or eliminated,
+    and once one of them is 0 the other is NO_NUMBER. Teams with MISSING records are left
+    out of everyone else's numbers."""
+    missing = (records == MISSING).any(axis=-1)
+    wins = records[:, :, 0].astype(np.int32)
+    losses = records[:, :, 1].astype(np.int32)
+    magic = np.full(wins.shape, NO_NUMBER, dtype=np.int32)
+    elimination = np.full(wins.shape, NO_NUMBER, dtype=np.int32)
+    # a missing team can't be anyone's closest rival
+    no_rival = season_length + 1
+    for division_id in team_index.division_ids:
+        division_slice = team_index.division_slices[division_id]
+        division_missing = missing[:, division_slice]
+        division_wins = np.where(division_missing, -no_rival, wins[:, division_slice])
+        division_losses = np.where(division_missing, no_rival, losses[:, division_slice])
+        for team in range(division_wins.shape[1]):
+            others = np.delete(np.arange(division_wins.shape[1]), team)
+            if len(others) == 0:
+                continue
+            # wins by the team plus losses by whoever's closest
+            team_magic = season_length + 1 - division_wins[:, team] - division_losses[:, others].min(axis=1)
+            # wins by whoever's ahead plus losses by the team
+            team_elimination = season_length + 1 - division_wins[:, others].max(axis=1) - division_losses[:, team]
+            known = ~division_missing[:, team] & ~division_missing[:, others].all(axis=1)
+            clinched = team_magic <= 0
+            eliminated = team_elimination <= 0
+            magic[:, division_slice.start + team] = np.where(known & ~eliminated, np.maximum(team_magic, 0), NO_NUMBER)
+            elimination[:, division_slice.start + team] = np.where(known & ~clinched, np.maximum(team_elimination, 0), NO_NUMBER)
+    return (magic, elimination)
+
+def sample_binomial(rng: np.random.Generator, trials: np.ndarray, probabilities: np.ndarray, simulations: int) -> np.ndarray:
+    """Same distribution as rng.binomial(trials, probabilities, size=(simulations, len(trials))),
+    but much faster for a season's worth of trials: builds each team's CDF once and looks
+    uniform samples up in it."""
+    max_trials = int(trials.max(initial=0))
+    successes = np.arange(max_trials + 1)
+    # pmf[k + 1] = pmf[k] * (n - k) / (k + 1) * p / (1 - p), and 0 past n
+    ratios = np.maximum(trials[:, np.newaxis] - successes[np.newaxis, :-1], 0) / (successes[np.newaxis, 1:]) * \
+             (probabilities / (1 - probabilities))[:, np.newaxis]
+    pmf = np.concatenate([((1 - probabilities) ** trials)[:, np.newaxis], ratios], axis=1)
+    cdf = np.cumprod(pmf, axis=1).cumsum(axis=1)
+    uniforms = rng.random((simulations, len(trials)))
+    samples = np.empty((simulations, len(trials)), dtype=np.int64)
+    for team in range(len(trials)):
+        samples[:, team] = np.minimum(np.searchsorted(cdf[team], uniforms[:, team] * cdf[team, -1]), trials[team])
+    return samples
+
+def simulate_day(wins: np.ndarray, losses: np.ndarray, season_length: int, team_index: TeamIndex, leagues: list[list[int]],
+                 playoff_format: tuple[bool, int], simulations: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """Simulates the rest of the season from one day's records. Returns the chance each team
+    wins its division, and [team, seed - 1] the chance it gets each playoff seed."""
+    (runners_up, wild_cards) = playoff_format
+    num_teams = len(wins)
+    played = wins + losses
+    remaining = np.maximum(season_length - played, 0)
+    strength = (wins + REGRESSION_GAMES / 2) / (played + REGRESSION_GAMES)
+    # the random fraction breaks ties without changing who has more wins
+    final_wins = wins + sample_binomial(rng, remaining, strength, simulations) + rng.random((simulations, num_teams)) * 0.5
+
+    division_winners = np.zeros((simulations, num_teams), dtype=bool)
+    # higher is seeded first: division winners, then runners-up if they get in, then everyone else
+    seeding_keys = final_wins.copy()
+    sims = np.arange(simulations)
+    for division_id in team_index.division_ids:
+        division_slice = team_index.division_slices[division_id]
+        division_wins = final_wins[:, division_slice].copy()
+        winners = division_slice.start + division_wins.argmax(axis=1)
+        division_winners[sims, winners] = True
+        seeding_keys[sims, winners] += 2000
+        if runners_up and division_wins.shape[1] > 1:
+            division_wins[sims, winners - division_slice.start] = -1
+            seeding_keys[sims, division_slice.start + division_wins.argmax(axis=1)] += 1000
+
+    max_seeds = max(len(league) * (2 if runners_up else 1) + wild_cards for league in leagues)
+    seed_probabilities = np.zeros((num_teams, max_seeds))
+    for league in leagues:
+        columns = np.concatenate([np.arange(num_teams)[team_index.division_slices[team_index.division_ids[position]]] for position in league])
+        num_seeds = len(league) * (2 if runners_up else 1) + wild_cards
+        order = np.argsort(-seeding_keys[:, columns], axis=1)[:, :num_seeds]
+        for seed in range(num_seeds):
+            seed_probabilities[columns, seed] = np.bincount(order[:, seed], minlength=len(columns)) / simulations
+    return (division_winners.mean(axis=0), seed_probabilities)
+
+def simulate_days(year: int, rows: list[int], simulations: int, seed: int) -> tuple[int, list[int], np.ndarray, np.ndarray]:
+    """Simulates the given rows of a season's store. Runs in a worker process, so it loads the season itself."""
+    standings = MlbYearStandings.load(year, quiet=True)
+    store = standings.store
+    leagues = get_leagues(standings)
+    season_length = get_season_length(year)
+    playoff_format = get_playoff_format(year)
+    division_odds = []
+    seed_odds = []
+    for row in rows:
+        records = store.records[row].astype(np.int64)
+        records[records == MISSING] = 0
+        # the same day always gets the same random numbers, however the days are split up
+        rng = np.random.default_rng([seed, year, row])
+        (division, seeds) = simulate_day(records[:, 0], records[:, 1], season_length, standings.team_index, leagues,
+                                         playoff_format, simulations, rng)
+        division_odds.append(division)
+        seed_odds.append(seeds)
+    return (year, rows, np.array(division_odds), np.array(seed_odds))
+
+def odds_json(standings: MlbYearStandings, division_odds: np.ndarray, seed_odds: np.ndarray, simulations: int, standings_hash: str) -> dict:
+    """division_odds is [day, team] and seed_odds is [day, team, seed - 1], for each stored day."""
+    store = standings.store
+    team_index = standings.team_index
+    rows = store.rows()
+    season_length = get_season_length(standings.metadata.year)
+    (magic, elimination) = magic_numbers(store.records[rows], team_index, season_length)
+    def rounded(values: np.ndarray) -> list:
+        return np.round(values, 4).tolist()
+    def numbers(values: np.ndarray) -> list:
+        return [None if value == NO_NUMBER else value for value in values.tolist()]
+    return {'opening_day': store.row_date(rows[0]).strftime("%Y/%m/%d"),
+            'simulations': simulations,
+            'standings_hash': standings_hash,
+            'season_length': season_length,
+            'teams': {team_name: {'division': rounded(division_odds[:, column]),
+                                  'playoffs': rounded(seed_odds[:, column].sum(axis=-1)),
+                                  'seeds': rounded(seed_odds[:, column].T),
+                                  'magic_number': numbers(magic[:, column]),
+                                  'elimination_number': numbers(elimination[:, column])}
+                      for (column, team_name) in enumerate(team_index.team_names)}}
+
+def compute_odds(years: list[int], simulations: int = DEFAULT_SIMULATIONS, processes: int = 4, seed: int = 0,
+                 force: bool = False) -> list[int]:
+    """Writes the odds for each year that has a season file, unless they're already current
+    (or `force` is set). Returns the years it wrote."""
+    seasons = {year: standings for year in years
+               if (force or not odds_are_current(year, simulations)) and (standings := MlbYearStandings.load(year, quiet=True)) is not None}
+    tasks = []
+    for (year, standings) in seasons.items():
+        rows = standings.store.rows().tolist()
+        tasks.extend((year, rows[start:start + DAYS_PER_TASK]) for start in range(0, len(rows), DAYS_PER_TASK))
+    results : dict[int, list[tuple[list[int], np.ndarray, np.ndarray]]] = {year: [] for year in seasons}
+    if processes <= 1:
+        for (year, rows) in tasks:
+            (_, _, division_odds, seed_odds) = simulate_days(year, rows, simulations, seed)
+            results[year].append((rows, division_odds, seed_odds))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(simulate_days, year, rows, simulations, seed) for (year, rows) in tasks]
+            for future in futures:
+                (year, rows, division_odds, seed_odds) = future.result()
+                results[year].append((rows, division_odds, seed_odds))
+    for (year, standings) in seasons.items():
+        chunks = sorted(results[year], key=lambda chunk: chunk[0][0])
+        division_odds = np.concatenate([chunk[1] for chunk in chunks])
+        # leagues can have different numbers of seeds, but every chunk of a year has the same
+        seed_odds = np.concatenate([chunk[2] for chunk in chunks])
+        contents = json.dumps(odds_json(standings, division_odds, seed_odds, simulations, get_standings_hash(year))).encode('utf-8')
+        write_file_atomically(get_odds_json_file_path(year), contents)
+    return list(seasons.keys())
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    simulations = DEFAULT_SIMULATIONS
+    if '-n' in args:
+        simulations_index = args.index('-n')
+        simulations = int(args[simulations_index + 1])
+        del args[simulations_index:simulations_index + 2]
+    processes = 4
+    if '-j' in args:
+        processes_index = args.index('-j')
+        processes = int(args[processes_index + 1])
+        del args[processes_index:processes_index + 2]
+    force = '--force' in args
+    args = [arg for arg in args if arg != '--force']
+    first_year = int(args[0]) if len(args) > 0 else datetime.date.today().year
+    last_year = int(args[1]) if len(args) > 1 else first_year
+    start_time = time.perf_counter()
+    written = compute_odds(list(range(first_year, last_year + 1)), simulations=simulations, processes=processes, force=force)
+    print(f"Wrote odds for {len(written)} seasons in {time.perf_counter() - start_time:.1f} seconds")
@@ -0,0 +1,225 @@
+from __future__ import annotations
+import datetime
+import io
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from getmlbstandings.getmlbstandings import (MISSING, DivisionId, MlbMetadata, StandingsStore, TeamIndex,
+                                             write_file_atomically)
+
+# Every season in one place, so historical queries don't have to parse every year's JSON.
+#
+# The store is two files in data/store/:
+#   records.npy  int16 [season, day, slot, wins/losses], padded with MISSING past the end
+#                of each season (and past the last team), so it can be memory-mapped
+#   index.json   for each season, its year, opening day, number of days, and divisions
+#                with the slots their teams are in (slots are in TeamIndex column order)
+# It's rebuilt from the season files whenever one of them changes.
+
+STORE_FORMAT = "store-1"
+
+def get_data_path() -> Path:
+    return Path(os.path.realpath(__file__)).parent / "data"
+
+def get_store_path(data_path: Optional[Path] = None) -> Path:
+    return (data_path or get_data_path()) / "store"
+
+def get_season_file_paths(data_path: Path) -> list[Path]:
+    return sorted(path for path in data_path.glob("*.json") if path.stem.isdigit())
+
+def get_source_stamps(data_path: Path) -> dict[str, list[int]]:
+    stamps = dict()
+    for path in get_season_file_paths(data_path):
+        stat = path.stat()
+        stamps[path.name] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+def build_store(data_path: Optional[Path] = None, store_path: Optional[Path] = None):
+    """Builds the store from every season file in data_path."""
+    data_path = data_path or get_data_path()
+    store_path = store_path or get_store_path(data_path)
+    # stamp before reading so a file written while we're building makes the store stale
+    stamps = get_source_stamps(data_path)
+    seasons = []
+    season_records = []
+    for path in get_season_file_paths(data_path):
+        with open(path, 'r') as f:
+            j = json.load(f)
+        year = int(path.stem)
+        metadata = MlbMetadata.from_json(year, j['metadata'])
+        team_index = TeamIndex(metadata)
+        opening_day = datetime.datetime.strptime(j['opening_day'], "%Y/%m/%d").date()
+        store = StandingsStore.from_json_standings(team_index, opening_day, j['standings'])
+        divisions = []
+        for division_id in team_index.division_ids:
+            division_slice = team_index.division_slices[division_id]
+            divisions.append({'id': division_id,
+                              'name': metadata.id_to_division_info_dict[division_id].name,
+                              'start': division_slice.start,
+                              'teams': team_index.team_names[division_slice]})
+        seasons.append({'year': year, 'opening_day': j['opening_day'], 'num_days': len(store.records), 'divisions': divisions})
+        season_records.append(store.records)
+    max_days = max((len(records) for records in season_records), default=0)
+    max_teams = max((records.shape[1] for records in season_records), default=0)
+    records = np.full((len(season_records), max_days, max_teams, 2), MISSING, dtype=np.int16)
+    for (position, season) in enumerate(season_records):
+        records[position, :season.shape[0], :season.shape[1]] = season
+    records_file = io.BytesIO()
+    np.save(records_file, records)
+    write_file_atomically(store_path / "records.npy", records_file.getvalue())
+    # the index goes last, it's what says the records are up to date
+    index = {'format': STORE_FORMAT, 'sources': stamps, 'shape': list(records.shape), 'seasons': seasons}
+    write_file_atomically(store_path / "index.json", json.dumps(index).encode('utf-8'))
+
+def store_is_stale(data_path: Optional[Path] = None, store_path: Optional[Path] = None) -> bool:
+    data_path = data_path or get_data_path()
+    store_path = store_path or get_store_path(data_path)
+    try:
+        with open(store_path / "index.json", 'r') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return True
+    return index.get('format') != STORE_FORMAT or index['sources'] != get_source_stamps(data_path)
+
+class DivisionRace:
+    """How a division finished: the winner and how many games back the runner-up was.
+
+    If teams tied for first, the standings can't say who won (it took a tiebreaker game or
+    a tiebreaker rule), so winner and runner_up are None and `leaders` has the tied teams."""
+    def __init__(self, year: int, division_id: DivisionId, division_name: str, leaders: list[str], runner_up: Optional[str], games_back: float):
+        self.year = year
+        self.division_id = division_id
+        self.division_name = division_name
+        self.leaders = leaders
+        self.tied = len(leaders) > 1
+        self.winner = leaders[0] if not self.tied else None
+        self.runner_up = runner_up if not self.tied else None
+        self.games_back = games_back
+
+    def __str__(self):
+        if self.tied:
+            return f"{self.year} {self.division_name}: {' and '.join(self.leaders)} tied for first"
+        return f"{self.year} {self.division_name}: {self.winner} over {self.runner_up} by {self.games_back:g}"
+
+    def __repr__(self):
+        return self.__str__()
+
+class SeasonStore:
+    """Read-only view of the store, with the records memory-mapped."""
+    def __init__(self, index: dict, records: np.ndarray):
+        self.index = index
+        self.records = records
+        self.seasons : list[dict] = index['seasons']
+        self.season_positions : dict[int, int] = {season['year']: position for (position, season) in enumerate(self.seasons)}
+        # team name -> [(season position, slot)]
+        self.team_slots : dict[str, list[tuple[int, int]]] = dict()
+        for (position, season) in enumerate(self.seasons):
+            for division in season['divisions']:
+                for (offset, team_name) in enumerate(division['teams']):
+                    self.team_slots.setdefault(team_name, []).append((position, division['start'] + offset))
+
+    @classmethod
+    def open(cls, data_path: Optional[Path] = None, store_path: Optional[Path] = None, rebuild_if_stale: bool = True) -> SeasonStore:
+        data_path = data_path or get_data_path()
+        store_path = store_path or get_store_path(data_path)
+        if rebuild_if_stale and store_is_stale(data_path, store_path):
+            build_store(data_path, store_path)
+        with open(store_path / "index.json", 'r') as f:
+            index = json.load(f)
+        records = np.load(store_path / "records.npy", mmap_mode='r')
+        if list(records.shape) != index['shape']:
+            raise ValueError(f"{store_path} records don't match the index, rebuild it")
+        return cls(index, records)
+
+    @property
+    def years(self) -> list[int]:
+        return [season['year'] for season in self.seasons]
+
+    @property
+    def team_names(self) -> list[str]:
+        return sorted(self.team_slots.keys())
+
+    def opening_day(self, year: int) -> datetime.date:
+        return datetime.datetime.strptime(self.seasons[self.season_positions[year]]['opening_day'], "%Y/%m/%d").date()
+
+    def season_records(self, year: int) -> np.ndarray:
+        """[day, slot, wins/losses] for the year, with days starting at opening day."""
+        position = self.season_positions[year]
+        return self.records[position, :self.seasons[position]['num_days']]
+
+    def _years_in_range(self, first_year: Optional[int], last_year: Optional[int]) -> list[int]:
+        return [year for year in self.years
+                if (first_year is None or year >= first_year) and (last_year is None or year <= last_year)]
+
+    def team_records(self, team_name: str, first_year: Optional[int] = None, last_year: Optional[int] = None) -> dict[int, np.ndarray]:
+        """[day, wins/losses] for each year in the range the team played in."""
+        team_records = dict()
+        for (position, slot) in self.team_slots.get(team_name, []):
+            year = self.seasons[position]['year']
+            if (first_year is None or year >= first_year) and (last_year is None or year <= last_year):
+                team_records[year] = self.records[position, :self.seasons[position]['num_days'], slot]
+        return team_records
+
+    def games_over_500(self, team_name: str, first_year: Optional[int] = None, last_year: Optional[int] = None) -> dict[int, np.ndarray]:
+        """Wins minus losses for each day of each year in the range the team played in."""
+        return {year: records[:, 0].astype(np.int32) - records[:, 1]
+                for (year, records) in self.team_records(team_name, first_year, last_year).items()}
+
+    def final_races(self, first_year: Optional[int] = None, last_year: Optional[int] = None) -> list[DivisionRace]:
+        """How every division finished in the range of years. Defaults to every season
+        before this one, since this one isn't over yet."""
+        if last_year is None:
+            last_year = datetime.date.today().year - 1
+        races = []
+        for year in self._years_in_range(first_year, last_year):
+            position = self.season_positions[year]
+            season = self.seasons[position]
+            final_records = self.records[position, season['num_days'] - 1]
+            for division in season['divisions']:
+                division_records = final_records[division['start']:division['start'] + len(division['teams'])]
+                if len(division['teams']) < 2 or (division_records == MISSING).any():
+                    continue
+                over_500 = division_records[:, 0].astype(np.int32) - division_records[:, 1]
+                # stable, so tied teams stay in alphabetical order
+                order = np.argsort(-over_500, kind='stable')
+                leaders = [division['teams'][slot] for slot in order if over_500[slot] == over_500[order[0]]]
+                races.append(DivisionRace(year, DivisionId(division['id']), division['name'],
+                                          leaders, division['teams'][order[1]],
+                                          (over_500[order[0]] - over_500[order[1]]) / 2))
+        return races
+
+    def close_races(self, max_games_back: float, first_year: Optional[int] = None, last_year: Optional[int] = None) -> list[DivisionRace]:
+        """Division races where the runner-up finished fewer than max_games_back games back."""
+        return [race for race in self.final_races(first_year, last_year) if race.games_back < max_games_back]
+
+if __name__ == '__main__':
+    # no arguments rebuilds the store
+    # races <games back> [first year] [last year] prints the close division races
+    # team <team name> [first year] [last year] prints the team's final games over .500
+    args = sys.argv[1:]
+    if len(args) == 0:
+        build_store()
+        sys.exit(0)
+    store = SeasonStore.open()
+    if args[0] == 'races':
+        first_year = int(args[2]) if len(args) > 2 else None
+        last_year = int(args[3]) if len(args) > 3 else None
+        for race in store.close_races(float(args[1]), first_year, last_year):
+            print(race)
+    elif args[0] == 'team':
+        first_year = int(args[2]) if len(args) > 2 else None
+        last_year = int(args[3]) if len(args) > 3 else None
+        curves = store.games_over_500(args[1], first_year, last_year)
+        if len(curves) == 0:
+            print(f"No seasons for {args[1]}")
+            sys.exit(1)
+        for (year, curve) in curves.items():
+            print(f"{year}: {int(curve[-1]):+d} (best {int(curve.max()):+d}, worst {int(curve.min()):+d})")
+    else:
+        print(f"Unknown command {args[0]}")
+        sys.exit(1)
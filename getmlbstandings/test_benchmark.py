@@ -0,0 +1,57 @@
+import datetime
+import unittest
+from getmlbstandings.getmlbstandings import ValidationIssue, previous_day
+from getmlbstandings.benchmark import *
+from getmlbstandings.testsupport import TempDataTestCase
+
+class TestSyntheticSeason(TempDataTestCase):
+    def populate(self, season: SyntheticSeason) -> MlbYearStandings:
+        fetcher = make_synthetic_fetcher(FakeStandingsSource(season))
+        standings = MlbYearStandings(MlbMetadata.get_metadata(season.year, quiet=True, fetcher=fetcher), quiet=True, fetcher=fetcher)
+        standings.populate()
+        return standings
+
+    def test_season_looks_real(self):
+        season = SyntheticSeason()
+        self.assertEqual(season.records.shape[1], 30)
+        self.assertTrue((season.records[-1].sum(axis=-1) == 162).all())
+        self.assertGreater(len(season.off_days), 0)
+        standings = self.populate(season)
+        self.assertEqual(standings.store.days()[0], previous_day(season.opening_day))
+        self.assertEqual(standings.store.days()[-1], season.last_day)
+        report = standings.validate()
+        self.assertEqual(report.issues, [])
+
+    def test_anomalies_get_fixed(self):
+        season = SyntheticSeason(anomalies=3, stale_preseason=True, seed=1)
+        standings = self.populate(season)
+        self.assertEqual(standings.store.days()[0], previous_day(season.opening_day))
+        report = standings.validate()
+        self.assertTrue(report.ok)
+        messages = [issue.message for issue in report.of_severity(ValidationIssue.FIXED)]
+        self.assertTrue(any("Missing data for" in message for message in messages))
+        self.assertTrue(any("No data for division" in message for message in messages))
+        self.assertTrue(any("Resetting wins" in message for message in messages))
+
+    def test_strike_shortened_season(self):
+        season = SyntheticSeason(divisions=4, strike_day=100)
+        self.assertEqual(season.num_days, 101)
+        self.assertLess(season.records[-1].sum(axis=-1).max(), 162)
+        standings = self.populate(season)
+        self.assertEqual(standings.store.days()[-1], season.last_day)
+        self.assertTrue(standings.validate().ok)
+
+    def test_latency(self):
+        slept = []
+        source = FakeStandingsSource(SyntheticSeason(), latency=0.25, sleep=slept.append)
+        source(leagueId="103,104", date="08/01/2019")
+        self.assertEqual(slept, [0.25])
+        self.assertEqual(source.calls, 1)
+
+class TestRunBenchmarks(unittest.TestCase):
+    def test_run_benchmarks(self):
+        results = run_benchmarks([1], repeat=1)
+        self.assertEqual([result.name for result in results],
+                         ["populate", "_store_day_data", "validate_and_fix_data", "load_from_file", "write_to_json"])
+        table = format_benchmark_results(results, baseline=results_to_json(results))
+        self.assertEqual(table.splitlines()[1].split()[-1], "1.00x")
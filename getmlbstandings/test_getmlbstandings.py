@@ -1,6 +1,16 @@
 import datetime
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
+from pathlib import Path
+from unittest import mock
 from getmlbstandings.getmlbstandings import *
+from getmlbstandings.testsupport import FakeStatsApi, TempDataTestCase, make_fake_fetcher, make_fake_standings
 
 class TestUtilityMethods(unittest.TestCase):
     def test_previousday_lastdayofmonth(self):
@@ -22,6 +32,671 @@ class TestUtilityMethods(unittest.TestCase):
         self.assertEqual(next_day(datetime.date(year=2021, month=6, day=15)), datetime.date(year=2021, month=6, day=16))
 
 
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_waits(self):
+        now = [0.0]
+        def sleep(seconds):
+            now[0] += seconds
+        limiter = RateLimiter(rate=2.0, burst=2, clock=lambda: now[0], sleep=sleep)
+        self.assertEqual(limiter.acquire(), 0.0)
+        self.assertEqual(limiter.acquire(), 0.0)
+        self.assertAlmostEqual(limiter.acquire(), 0.5)
+        self.assertAlmostEqual(now[0], 0.5)
+
+class TestStandingsFetcher(unittest.TestCase):
+    def test_fetch_many_keeps_date_order(self):
+        fake = FakeStatsApi(datetime.date(2021, 4, 1), datetime.date(2021, 9, 30))
+        fetcher = make_fake_fetcher(fake)
+        dates = [datetime.date(2021, 5, day) for day in range(1, 15)]
+        results = fetcher.fetch_many(dates)
+        self.assertEqual(results, [fake.standings_data(LEAGUE_IDS, d.strftime('%m/%d/%Y')) for d in dates])
+
+    def test_fetch_retries(self):
+        fake = FakeStatsApi(datetime.date(2021, 4, 1), datetime.date(2021, 9, 30), failures=2)
+        fetcher = make_fake_fetcher(fake)
+        self.assertNotEqual(fetcher.fetch(datetime.date(2021, 5, 1)), {})
+        self.assertEqual(len(fake.calls), 3)
+
+    def test_fetch_gives_up(self):
+        fake = FakeStatsApi(datetime.date(2021, 4, 1), datetime.date(2021, 9, 30), failures=10)
+        fetcher = make_fake_fetcher(fake)
+        with self.assertRaises(ValueError):
+            fetcher.fetch(datetime.date(2021, 5, 1))
+
+class TestMetrics(unittest.TestCase):
+    def test_fetcher_metrics(self):
+        fake = FakeStatsApi(failures=1)
+        fetcher = make_fake_fetcher(fake, workers=1)
+        make_fake_standings(fake, fetcher).validate()
+        j = fetcher.metrics.to_json()
+        self.assertEqual(set(j['stages'].keys()), {"metadata", "opening_day", "fetch", "validation"})
+        self.assertEqual(j['counters']['requests_total'], len(fake.calls))
+        self.assertEqual(j['counters']['request_errors_total'], 1)
+        self.assertEqual(j['counters']['validation_fixes_total'], 0)
+        self.assertEqual(j['latencies']['standings']['count'], len(fake.calls) - 1)
+
+    def test_prometheus(self):
+        times = iter([1.0, 3.5])
+        metrics = Metrics(clock=lambda: next(times))
+        with metrics.stage("fetch"):
+            pass
+        metrics.add("requests_total", 3)
+        metrics.observe("standings", 0.5)
+        other = Metrics()
+        other.add("requests_total", 2)
+        metrics.merge(other.to_json())
+        lines = metrics.to_prometheus(timestamp=1000).splitlines()
+        self.assertIn('getmlbstandings_stage_seconds{stage="fetch"} 2.500000', lines)
+        self.assertIn('# TYPE getmlbstandings_requests_total counter', lines)
+        self.assertIn('getmlbstandings_requests_total 5', lines)
+        self.assertIn('getmlbstandings_request_seconds_sum{kind="standings"} 0.5', lines)
+        self.assertEqual(lines[-1], 'getmlbstandings_last_run_timestamp_seconds 1000')
+
+    def test_prometheus_values_are_exact(self):
+        metrics = Metrics()
+        metrics.add("bytes_total", 123456789)
+        metrics.set("next_poll_seconds", 1800.5)
+        metrics.set("next_poll_seconds", 3600.25)
+        metrics.merge({'stages': {}, 'counters': {}, 'latencies': {"standings": {'count': 1234567, 'sum': 10.0, 'max': 0.5}}})
+        lines = metrics.to_prometheus(timestamp=1000).splitlines()
+        self.assertIn('getmlbstandings_bytes_total 123456789', lines)
+        self.assertIn('getmlbstandings_next_poll_seconds 3600.25', lines)
+        self.assertIn('getmlbstandings_request_seconds_count{kind="standings"} 1234567', lines)
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.now = [1000.0]
+        self.cache = ResponseCache(Path(self.temp_dir.name), max_age=60, clock=lambda: self.now[0])
+        self.fake = FakeStatsApi(datetime.date(2021, 4, 1), datetime.date(2021, 9, 30))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_roundtrip_keeps_division_ids(self):
+        data = self.fake.standings_data(LEAGUE_IDS, "05/01/2021")
+        self.cache.put(datetime.date(2021, 5, 1), LEAGUE_IDS, data)
+        self.assertEqual(self.cache.get(datetime.date(2021, 5, 1), LEAGUE_IDS), data)
+        self.assertIsNone(self.cache.get(datetime.date(2021, 5, 2), LEAGUE_IDS))
+
+    def test_recent_dates_expire(self):
+        today = datetime.date.today()
+        self.cache.put(today, LEAGUE_IDS, {})
+        self.assertEqual(self.cache.get(today, LEAGUE_IDS), {})
+        self.now[0] += 61
+        self.assertIsNone(self.cache.get(today, LEAGUE_IDS))
+        self.cache.replay = True
+        self.assertEqual(self.cache.get(today, LEAGUE_IDS), {})
+
+    def test_past_seasons_are_immutable(self):
+        self.cache.put(datetime.date(2021, 5, 1), LEAGUE_IDS, {})
+        self.now[0] += 1000000
+        self.assertEqual(self.cache.get(datetime.date(2021, 5, 1), LEAGUE_IDS), {})
+
+    def test_season_becomes_immutable_when_it_ends(self):
+        date = datetime.date(2021, 5, 1)
+        with mock.patch.object(self.cache, 'is_immutable', return_value=False):
+            self.cache.put(date, LEAGUE_IDS, {})
+            self.now[0] += 61
+            self.assertIsNone(self.cache.get(date, LEAGUE_IDS))
+        # the year has rolled over since the entry was stored
+        self.assertEqual(self.cache.get(date, LEAGUE_IDS), {})
+
+    def test_eviction(self):
+        self.cache.max_bytes = 2000
+        for day in range(1, 20):
+            date = datetime.date(2021, 5, day)
+            self.cache.put(date, LEAGUE_IDS, self.fake.standings_data(LEAGUE_IDS, date.strftime('%m/%d/%Y')))
+        self.assertLessEqual(self.cache.total_bytes, 2000)
+        self.assertEqual(self.cache.total_bytes, sum(p.stat().st_size for p in Path(self.temp_dir.name).glob("*/*.json")))
+        self.assertIsNotNone(self.cache.get(datetime.date(2021, 5, 19), LEAGUE_IDS))
+
+    def test_fetcher_uses_cache_and_replay(self):
+        fetcher = make_fake_fetcher(self.fake, cache=self.cache)
+        first = fetcher.fetch(datetime.date(2021, 5, 1))
+        self.assertEqual(fetcher.fetch(datetime.date(2021, 5, 1)), first)
+        self.assertEqual(len(self.fake.calls), 1)
+        self.cache.replay = True
+        with self.assertRaises(CacheMissError):
+            fetcher.fetch(datetime.date(2021, 5, 2))
+        self.assertEqual(len(self.fake.calls), 1)
+
+class TestOpeningDay(unittest.TestCase):
+    def get_opening_day(self, opening_day: datetime.date) -> tuple[datetime.date, MlbYearStandings, FakeStatsApi]:
+        fake = FakeStatsApi(opening_day, datetime.date(opening_day.year, 9, 30))
+        fetcher = make_fake_fetcher(fake)
+        metadata = MlbMetadata.get_metadata(opening_day.year, quiet=True, fetcher=fetcher)
+        fake.calls.clear()
+        standings = MlbYearStandings(metadata, quiet=True, fetcher=fetcher)
+        return (standings._get_opening_day(), standings, fake)
+
+    def test_opening_day_after_guess(self):
+        found, standings, fake = self.get_opening_day(datetime.date(2022, 4, 7))
+        self.assertEqual(found, datetime.date(2022, 4, 7))
+        self.assertLessEqual(len(fake.calls), 8)
+        self.assertIn(found, standings.all_day_data)
+
+    def test_opening_day_long_after_guess(self):
+        found, standings, fake = self.get_opening_day(datetime.date(2021, 6, 13))
+        self.assertEqual(found, datetime.date(2021, 6, 13))
+        self.assertLessEqual(len(fake.calls), 15)
+
+    def test_opening_day_before_guess(self):
+        found, standings, fake = self.get_opening_day(datetime.date(2019, 3, 20))
+        self.assertEqual(found, datetime.date(2019, 3, 20))
+        self.assertLessEqual(len(fake.calls), 12)
+        # days after opening day we happened to fetch are kept
+        self.assertIn(datetime.date(2019, 4, 1), standings.all_day_data)
+        for day in standings.all_day_data:
+            self.assertGreaterEqual(day, found)
+
+    def test_opening_day_on_guess(self):
+        found, standings, fake = self.get_opening_day(datetime.date(2021, 4, 1))
+        self.assertEqual(found, datetime.date(2021, 4, 1))
+
+class TestStandingsStore(unittest.TestCase):
+    def make_store(self) -> StandingsStore:
+        fake = FakeStatsApi(datetime.date(2021, 4, 1), datetime.date(2021, 9, 30))
+        metadata = MlbMetadata.get_metadata(2021, quiet=True, fetcher=make_fake_fetcher(fake))
+        return StandingsStore(TeamIndex(metadata))
+
+    def test_load_from_file_roundtrip(self):
+        metadata = MlbMetadata.load_from_file(2021)
+        standings = MlbYearStandings(metadata, quiet=True)
+        standings.load_from_file()
+        with open(get_json_file_path(2021), 'r') as f:
+            j = json.load(f)
+        self.assertEqual(len(standings.all_day_data), len(j['standings']))
+        self.assertEqual(json.loads(json.dumps(standings.store.to_json_standings())), j['standings'])
+
+    def test_load_parses_standings_lazily(self):
+        standings = MlbYearStandings.load(2021, quiet=True)
+        self.assertIsNotNone(standings._season_file)
+        with open(get_json_file_path(2021), 'r') as f:
+            j = json.load(f)
+        self.assertEqual(str(standings.metadata), str(MlbMetadata.from_json(2021, j['metadata'])))
+        self.assertNotIn("parse", standings.fetcher.metrics.stages)
+        self.assertEqual(json.loads(json.dumps(standings.store.to_json_standings())), j['standings'])
+        self.assertIsNone(standings._season_file)
+        self.assertIn("parse", standings.fetcher.metrics.stages)
+
+    def test_season_file_layouts(self):
+        with open(get_json_file_path(2021), 'r') as f:
+            contents = f.read()
+        j = json.loads(contents)
+        season_file = SeasonFile(contents)
+        self.assertIsNone(season_file.parsed)
+        self.assertEqual(season_file.opening_day, datetime.datetime.strptime(j['opening_day'], "%Y/%m/%d").date())
+        # laid out some other way, it still loads
+        reordered = SeasonFile(json.dumps({'standings': j['standings'], 'opening_day': j['opening_day'], 'metadata': j['metadata']}))
+        self.assertIsNotNone(reordered.parsed)
+        for other in (season_file, reordered):
+            self.assertEqual(other.metadata_json, j['metadata'])
+            self.assertEqual(other.standings_json(), j['standings'])
+        with self.assertRaises(json.JSONDecodeError):
+            SeasonFile(contents[:-10])
+
+    def test_import_skips_statsapi(self):
+        code = "import sys, getmlbstandings.getmlbstandings; print('statsapi' in sys.modules, 'requests' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ["False", "False"])
+
+    def test_grows_in_both_directions(self):
+        store = self.make_store()
+        day = {200: [TeamStanding(TeamId(1), 1, 0), None, TeamStanding(TeamId(3), 0, 1)]}
+        store.set_day(datetime.date(2021, 5, 1), day)
+        store.set_day(datetime.date(2021, 4, 1), {200: [TeamStanding(None, 0, 0)] * 3})
+        store.set_day(datetime.date(2021, 9, 1), day)
+        self.assertEqual(store.days(), [datetime.date(2021, 4, 1), datetime.date(2021, 5, 1), datetime.date(2021, 9, 1)])
+        loaded = store.get_day(datetime.date(2021, 5, 1))
+        self.assertEqual(list(loaded.keys()), [200])
+        self.assertIsNone(loaded[200][1])
+        self.assertEqual((loaded[200][2].team_id, loaded[200][2].wins, loaded[200][2].losses), (3, 0, 1))
+
+    def test_day_equals_ignores_team_ids(self):
+        store = self.make_store()
+        store.set_day(datetime.date(2021, 5, 1), {200: [TeamStanding(TeamId(1), 1, 0)] * 3})
+        store.set_day(datetime.date(2021, 5, 2), {200: [TeamStanding(None, 1, 0)] * 3})
+        store.set_day(datetime.date(2021, 5, 3), {200: [TeamStanding(None, 1, 1)] * 3})
+        self.assertTrue(store.day_equals(datetime.date(2021, 5, 1), datetime.date(2021, 5, 2)))
+        self.assertFalse(store.day_equals(datetime.date(2021, 5, 2), datetime.date(2021, 5, 3)))
+        self.assertFalse(store.day_equals(datetime.date(2021, 5, 2), datetime.date(2021, 5, 4)))
+        store.delete_day(datetime.date(2021, 5, 2))
+        self.assertNotIn(datetime.date(2021, 5, 2), store)
+
+class TestValidation(unittest.TestCase):
+    def make_standings(self) -> MlbYearStandings:
+        return make_fake_standings()
+
+    def test_clean_season(self):
+        report = self.make_standings().validate()
+        self.assertTrue(report.ok)
+        self.assertEqual(report.issues, [])
+
+    def test_fixes_missing_team_and_division(self):
+        standings = self.make_standings()
+        day = datetime.date(2021, 5, 10)
+        day_data = standings.all_day_data[day]
+        del day_data[204]
+        day_data[200][1] = None
+        standings.all_day_data[day] = day_data
+        report = standings.validate()
+        self.assertTrue(report.ok)
+        self.assertEqual(report.fix_count, 2)
+        self.assertEqual(standings.all_day_data[day][204][0].wins, standings.all_day_data[previous_day(day)][204][0].wins)
+        self.assertEqual(standings.all_day_data[day][200][1].wins, standings.all_day_data[previous_day(day)][200][1].wins)
+
+    def test_resets_wins_that_went_down(self):
+        standings = self.make_standings()
+        day = standings.store.days()[-1]
+        day_data = standings.all_day_data[day]
+        day_data[200][0].wins = standings.all_day_data[previous_day(day)][200][0].wins - 1
+        standings.all_day_data[day] = day_data
+        report = standings.validate()
+        self.assertTrue(report.ok)
+        self.assertEqual(report.fix_count, 1)
+        self.assertEqual(standings.all_day_data[previous_day(day)][200][0].wins, day_data[200][0].wins)
+
+    def test_reports_jumps_and_team_ids(self):
+        standings = self.make_standings()
+        last_day = standings.store.days()[-1]
+        day_data = standings.all_day_data[last_day]
+        day_data[200][0].wins += 5
+        day_data[204][2].team_id = TeamId(999)
+        standings.all_day_data[last_day] = day_data
+        report = standings.validate()
+        self.assertFalse(report.ok)
+        errors = report.of_severity(ValidationIssue.ERROR)
+        self.assertEqual([(error.date, error.division_id) for error in errors], [(last_day, 204), (last_day, 200), (last_day, None)])
+        self.assertTrue(errors[2].message.startswith("Mismatched number of games played!"))
+        self.assertFalse(standings.validate_and_fix_data())
+
+    def test_all_data_files(self):
+        # 1999's last day really does have teams with 160 and 163 games played
+        known_bad_years = {1999}
+        for year in range(1995, datetime.date.today().year + 1):
+            metadata = MlbMetadata.load_from_file(year)
+            if metadata is None:
+                continue
+            standings = MlbYearStandings(metadata, quiet=True)
+            standings.load_from_file()
+            self.assertEqual(standings.validate().ok, year not in known_bad_years, year)
+
+class TestUpdate(TempDataTestCase):
+    def test_update_patches_file(self):
+        fake = FakeStatsApi()
+        standings = make_fake_standings(fake)
+        fetcher = standings.fetcher
+        # pretend we stopped partway through the season
+        for day in standings.store.days():
+            if day > datetime.date(2021, 6, 1):
+                standings.store.delete_day(day)
+        standings.write_to_json()
+
+        loaded = MlbYearStandings.load(2021, quiet=True, fetcher=fetcher)
+        fake.calls.clear()
+        update_start = loaded.update()
+        # the refetched days didn't change
+        self.assertEqual(fake.calls[0], datetime.date(2021, 5, 30))
+        self.assertEqual(update_start, datetime.date(2021, 6, 2))
+        report = loaded.validate(is_update=True, since=update_start)
+        self.assertTrue(report.ok)
+        loaded.write_to_json(since=previous_day(update_start))
+        patched = self.read_file(2021)
+        loaded.write_to_json()
+        self.assertEqual(patched, self.read_file(2021))
+        self.assertEqual(loaded.store.days()[-1], datetime.date(2021, 9, 30))
+        self.assertIsNone(loaded.update())
+
+    def test_update_skips_cache(self):
+        fake = FakeStatsApi()
+        fetcher = make_fake_fetcher(fake, cache=ResponseCache(self.temp_path / "cache"))
+        standings = make_fake_standings(fake, fetcher)
+        self.assertEqual(standings.store.days()[-1], datetime.date(2021, 9, 30))
+        # a game that got played late, after we'd cached the day
+        fake.last_day = datetime.date(2021, 10, 1)
+        fake.calls.clear()
+        self.assertEqual(standings.update(), datetime.date(2021, 10, 1))
+        self.assertGreater(len(fake.calls), 0)
+        astros = standings.team_index.columns[(DivisionId(200), "Houston Astros")]
+        self.assertEqual(tuple(standings.store.records[standings.store.row(fake.last_day), astros].tolist()), fake.record(0, fake.last_day))
+        # and the cache has the new response
+        self.assertEqual(fetcher.cache.get(datetime.date(2021, 10, 1), LEAGUE_IDS), fake.standings_data(LEAGUE_IDS, "10/01/2021"))
+
+    def test_fingerprints(self):
+        store = make_fake_standings().store
+        # computed when the day was stored
+        self.assertNotEqual(store.fingerprints[store.row(datetime.date(2021, 6, 1))], 0)
+        # every 7th day is an off day
+        off_days = [day for day in store.days()[1:] if store.day_equals(day, previous_day(day))]
+        self.assertGreater(len(off_days), 0)
+        day = datetime.date(2021, 6, 1)
+        fingerprint = store.fingerprint(day)
+        store.set_team(day, DivisionId(200), "Houston Astros", None, 100, 0)
+        self.assertNotEqual(store.fingerprint(day), fingerprint)
+        store.copy_day(previous_day(day), day)
+        self.assertEqual(store.fingerprint(day), store.fingerprint(previous_day(day)))
+        self.assertIsNone(store.fingerprint(datetime.date(2021, 12, 1)))
+
+    def test_patch_with_no_new_days(self):
+        standings = make_fake_standings()
+        standings.write_to_json()
+        full = self.read_file(2021)
+        standings.write_to_json(since=datetime.date(2021, 10, 5))
+        self.assertEqual(full, self.read_file(2021))
+        standings.write_to_json(since=datetime.date(2021, 9, 29))
+        self.assertEqual(full, self.read_file(2021))
+
+    def test_publish(self):
+        standings = make_fake_standings()
+        standings.write_to_json()
+        publish_path = self.temp_path / "dist"
+        self.assertTrue(publish_json_file(2021, publish_path))
+        entry = load_manifest(publish_path)['seasons']["2021"]
+        self.assertEqual(entry['days'], len(standings.store))
+        self.assertEqual(entry['file'], f"2021.{entry['hash']}.json")
+        with open(publish_path / entry['file'], 'r') as f:
+            self.assertEqual(f.read(), self.read_file(2021))
+        self.assertTrue((publish_path / (entry['file'] + ".gz")).exists())
+        # don't publish something smaller
+        standings.store.delete_day(datetime.date(2021, 9, 30))
+        standings.write_to_json()
+        self.assertFalse(publish_json_file(2021, publish_path))
+        # or something that hasn't changed
+        standings.populate()
+        standings.write_to_json()
+        manifest_mtime = (publish_path / MANIFEST_FILE_NAME).stat().st_mtime_ns
+        self.assertFalse(publish_json_file(2021, publish_path))
+        self.assertEqual((publish_path / MANIFEST_FILE_NAME).stat().st_mtime_ns, manifest_mtime)
+        # new contents get a new name, and superseded files stick around for a while
+        published_names = [entry['file']]
+        for last_day in (datetime.date(2021, 10, 1), datetime.date(2021, 10, 2)):
+            standings.store.copy_day(datetime.date(2021, 9, 30), last_day)
+            standings.write_to_json()
+            self.assertTrue(publish_json_file(2021, publish_path))
+            published_names.append(load_manifest(publish_path)['seasons']["2021"]['file'])
+        self.assertEqual(len(set(published_names)), 3)
+        self.assertEqual(sorted(path.name for path in publish_path.glob("2021.*.json")), sorted(published_names))
+        # until their grace period is up
+        long_ago = time.time() - PUBLISHED_FILE_GRACE_SECONDS - 60
+        for path in publish_path.glob(f"{published_names[0]}*"):
+            os.utime(path, (long_ago, long_ago))
+        standings.store.copy_day(datetime.date(2021, 9, 30), datetime.date(2021, 10, 3))
+        standings.write_to_json()
+        self.assertTrue(publish_json_file(2021, publish_path))
+        self.assertEqual(len(list(publish_path.glob(f"{published_names[0]}*"))), 0)
+        self.assertEqual(len(list(publish_path.glob("2021.*.json"))), 3)
+
+def make_schedule_game(away: str, home: str, away_won: Optional[bool], state: str = "Final", game_type: str = "R",
+                       game_pk: Optional[int] = None) -> dict:
+    game = {'gameType': game_type, 'status': {'detailedState': state},
+            'teams': {'away': {'team': {'name': away}, 'isWinner': away_won is True},
+                      'home': {'team': {'name': home}, 'isWinner': away_won is False}}}
+    if game_pk is not None:
+        game['gamePk'] = game_pk
+    return game
+
+def make_schedule_from_store(store: StandingsStore) -> dict:
+    """A schedule response with games that add up to the store's standings, pairing
+    each day's winners up with that day's losers."""
+    team_names = store.team_index.team_names
+    dates = []
+    game_pk = 1
+    for row in range(1, len(store.records)):
+        diffs = store.records[row] - store.records[row - 1]
+        winners = [team_names[column] for column in range(len(team_names)) for _ in range(diffs[column, 0])]
+        losers = [team_names[column] for column in range(len(team_names)) for _ in range(diffs[column, 1])]
+        games = []
+        for (winner, loser) in zip(winners, losers):
+            games.append(make_schedule_game(winner, loser, True, game_pk=game_pk))
+            game_pk += 1
+        date = datetime.date.fromordinal(store.first_day.toordinal() + row)
+        dates.append({'date': date.isoformat(), 'games': games})
+    return {'dates': dates}
+
+class TestStandingsFromSchedule(unittest.TestCase):
+    def test_adds_up_results(self):
+        fake = FakeStatsApi(datetime.date(2021, 4, 1), datetime.date(2021, 9, 30))
+        schedule = {'dates': [
+            {'date': '2021-03-25', 'games': [make_schedule_game("Houston Astros", "Texas Rangers", True, game_type="S")]},
+            {'date': '2021-04-01', 'games': [make_schedule_game("Houston Astros", "Texas Rangers", True),
+                                             make_schedule_game("Atlanta Braves", "New York Mets", False)]},
+            # doubleheader, one game postponed
+            {'date': '2021-04-03', 'games': [make_schedule_game("Houston Astros", "Seattle Mariners", False),
+                                             make_schedule_game("Houston Astros", "Seattle Mariners", False),
+                                             make_schedule_game("Atlanta Braves", "Miami Marlins", None, state="Postponed")]},
+            {'date': '2021-04-04', 'games': [make_schedule_game("Texas Rangers", "Seattle Mariners", None)]},
+        ]}
+        fetcher = StandingsFetcher(quiet=True, rate_limiter=RateLimiter(rate=1e9, burst=1000),
+                                   standings_source=fake.standings_data, schedule_source=lambda startDate, endDate: schedule)
+        standings = make_fake_standings(fake, fetcher, populate=False)
+        standings.populate_from_schedule()
+        # the tie on the last day doesn't count, so the season ends the day before
+        self.assertEqual(standings.store.days(), [datetime.date(2021, 3, 31) + datetime.timedelta(days=i) for i in range(4)])
+        def records(day: datetime.date) -> dict:
+            return {division_id: [str(ts) for ts in teams] for (division_id, teams) in standings.all_day_data[day].items()}
+        self.assertEqual(records(datetime.date(2021, 3, 31)), {200: ["0-0", "0-0", "0-0"], 204: ["0-0", "0-0", "0-0"]})
+        self.assertEqual(records(datetime.date(2021, 4, 2)), {200: ["1-0", "0-0", "0-1"], 204: ["0-1", "0-0", "1-0"]})
+        self.assertEqual(records(datetime.date(2021, 4, 3)), {200: ["1-2", "2-0", "0-1"], 204: ["0-1", "0-0", "1-0"]})
+
+    def test_resumed_game(self):
+        fake = FakeStatsApi(datetime.date(2021, 4, 1), datetime.date(2021, 9, 30))
+        schedule = {'dates': [
+            # suspended on 4/1 but listed as final, then finished on 4/3
+            {'date': '2021-04-01', 'games': [make_schedule_game("Houston Astros", "Texas Rangers", True, game_pk=1),
+                                             make_schedule_game("Atlanta Braves", "New York Mets", False, game_pk=2)]},
+            {'date': '2021-04-03', 'games': [make_schedule_game("Houston Astros", "Texas Rangers", True, game_pk=1),
+                                             make_schedule_game("Houston Astros", "Seattle Mariners", False, game_pk=3)]},
+        ]}
+        fetcher = StandingsFetcher(quiet=True, rate_limiter=RateLimiter(rate=1e9, burst=1000),
+                                   standings_source=fake.standings_data, schedule_source=lambda startDate, endDate: schedule)
+        standings = make_fake_standings(fake, fetcher, populate=False)
+        standings.populate_from_schedule()
+        def records(day: datetime.date) -> dict:
+            return {division_id: [str(ts) for ts in teams] for (division_id, teams) in standings.all_day_data[day].items()}
+        # the resumed game counts once, on the day it was finished
+        self.assertEqual(records(datetime.date(2021, 4, 2)), {200: ["0-0", "0-0", "0-0"], 204: ["0-1", "0-0", "1-0"]})
+        self.assertEqual(records(datetime.date(2021, 4, 3)), {200: ["1-1", "1-0", "0-1"], 204: ["0-1", "0-0", "1-0"]})
+
+    def test_matches_stored_season(self):
+        # there's no network here, so the schedule is rebuilt from a stored season
+        stored = MlbYearStandings.load(2021, quiet=True).store
+        schedule = make_schedule_from_store(stored)
+        today = datetime.date.fromordinal(stored.first_day.toordinal() + len(stored.records))
+        built = standings_from_schedule(stored.team_index, schedule, today, quiet=True)
+        self.assertEqual(built.first_day, stored.first_day)
+        self.assertEqual(built.to_json_standings(), stored.to_json_standings())
+
+class TestDerivedSeries(unittest.TestCase):
+    def test_derived_series(self):
+        standings = MlbYearStandings.load(2021, quiet=True)
+        derived = standings.derived_series()
+        self.assertEqual(derived['opening_day'], "2021/03/31")
+        self.assertEqual([chart['title'] for chart in derived['charts']],
+                         ["American League West", "American League Central", "American League East", "American League",
+                          "National League West", "National League Central", "National League East", "National League", "All MLB"])
+        self.assertEqual(len(derived['charts'][-1]['teams']), 30)
+        num_days = len(standings.store)
+        giants = derived['teams']["San Francisco Giants"]
+        self.assertEqual(len(giants['wins']), num_days)
+        self.assertEqual((giants['wins'][-1], giants['losses'][-1]), (107, 55))
+        nl_west = derived['charts'][4]
+        self.assertEqual(nl_west['leader_games_above_500'][-1], 52)
+        self.assertEqual(len(nl_west['leader_games_above_500']), num_days)
+
+    def test_missing_records_are_null(self):
+        standings = make_fake_standings()
+        store = standings.store
+        records = store.records[store.rows()]
+        # one Astros day, and a day with nobody in the AL West
+        records[10, 0] = MISSING
+        records[20, 0:3] = MISSING
+        store.records[store.rows()] = records
+        derived = standings.derived_series()
+        astros = derived['teams']["Houston Astros"]
+        self.assertEqual((astros['wins'][10], astros['losses'][10]), (None, None))
+        self.assertEqual(astros['wins'][11], int(records[11, 0, 0]))
+        al_west = derived['charts'][0]
+        self.assertEqual(al_west['title'], "American League West")
+        self.assertEqual(al_west['leader_games_above_500'][10], int((records[10, 1:3, 0] - records[10, 1:3, 1]).max()))
+        self.assertIsNone(al_west['leader_games_above_500'][20])
+        self.assertIsNotNone(derived['charts'][-1]['leader_games_above_500'][20])
+
+class TestCompactFormat(TempDataTestCase):
+    def test_roundtrip_all_data_files(self):
+        for year in range(1995, datetime.date.today().year + 1):
+            file_path = get_json_file_path(year)
+            if not file_path.exists():
+                continue
+            with open(file_path, 'r') as f:
+                j = json.load(f)
+            compact = json.loads(json.dumps(compact_season_json(j)))
+            self.assertEqual(expand_season_json(compact), j, year)
+
+    def test_encoding(self):
+        j = {'metadata': {"200": {"name": "American League West", "teams": ["Houston Astros", "Texas Rangers"]}},
+             'opening_day': "2021/03/31",
+             'standings': [{"200": [[0, 0], [0, 0]]}, {"200": [[1, 0], [0, 1]]}, {"200": [[1, 0], [0, 1]]},
+                           {"200": [[1, 0], [0, 1]]}, {"200": [[3, 0], [0, 3]]}, {"200": [[2, 0], [0, 6]]}]}
+        compact = compact_season_json(j)
+        self.assertEqual(compact['baseline'], [0, 0, 0, 0])
+        self.assertEqual(compact['days'], ["31", 2, "62", [-1, 0, 0, 3]])
+        self.assertEqual(expand_season_json(compact), j)
+
+    def test_write_and_load_file(self):
+        # get_json_file_path here is still the real one
+        with open(get_json_file_path(2021), 'r') as original:
+            j = json.load(original)
+        with open(self.temp_path / "2021.json", 'w') as f:
+            json.dump(j, f)
+        write_compact_json_file(2021)
+        self.assertEqual(load_compact_json_file(2021), j)
+        compact_file_path = self.temp_path / "compact" / "2021.json"
+        with open(compact_file_path, 'rb') as f:
+            contents = f.read()
+        with gzip.open(self.temp_path / "compact" / "2021.json.gz", 'rb') as f:
+            self.assertEqual(f.read(), contents)
+        self.assertLess(len(contents), (self.temp_path / "2021.json").stat().st_size / 4)
+
+class TestRebuildYears(TempDataTestCase):
+    def test_rebuild_then_skip(self):
+        fake = FakeStatsApi()
+        result = rebuild_year(2021, fetcher=make_fake_fetcher(fake))
+        self.assertEqual(result.status, "rebuilt")
+        self.assertEqual(result.days, 180)
+        self.assertEqual(result.requests, len(fake.calls))
+        self.assertTrue((self.temp_path / "2021.json").exists())
+
+        fake.calls.clear()
+        result = rebuild_year(2021, fetcher=make_fake_fetcher(fake))
+        self.assertEqual(result.status, "skipped")
+        self.assertEqual(result.requests, 0)
+
+        result = rebuild_year(2021, force=True, fetcher=make_fake_fetcher(fake))
+        self.assertEqual(result.status, "rebuilt")
+        table = format_year_results([result])
+        self.assertEqual(table.splitlines()[1].split()[:3], ["2021", "rebuilt", "180"])
+
+    def test_errors_are_reported(self):
+        fake = FakeStatsApi(failures=100)
+        result = rebuild_year(2021, fetcher=make_fake_fetcher(fake))
+        self.assertEqual(result.status, "error: ValueError")
+
+    def test_shared_rate_limiter(self):
+        limiter = SharedRateLimiter(rate=1000.0, burst=2)
+        self.assertEqual(limiter.acquire(), 0.0)
+        self.assertEqual(limiter.acquire(), 0.0)
+        self.assertGreater(limiter.acquire(), 0.0)
+        self.assertLess(limiter.tokens, 1.0)
+
+class FakeSession:
+    def __init__(self, response: dict):
+        self.response = response
+        self.requests : list[tuple[str, dict]] = []
+
+    def get(self, url: str, params: dict, timeout: float):
+        self.requests.append((url, params))
+        return mock.Mock(json=lambda: self.response, raise_for_status=lambda: None)
+
+class TestDaemon(TempDataTestCase):
+    def test_session_standings(self):
+        team_record = {'team': {'id': 117, 'name': "Houston Astros", 'division': {'id': 200, 'name': "American League West"}},
+                       'wins': 10, 'losses': 5}
+        session = FakeSession({'records': [{'teamRecords': [team_record]}]})
+        api = StatsApiSession(session)
+        self.assertEqual(api.standings_data(leagueId=LEAGUE_IDS, date="05/01/2021"),
+                         {200: {'div_name': "American League West", 'teams': [{'name': "Houston Astros", 'team_id': 117, 'w': 10, 'l': 5}]}})
+        api.standings_data(leagueId=LEAGUE_IDS, date="05/02/2021")
+        self.assertEqual([url for (url, _) in session.requests], [f"{STATSAPI_BASE_URL}/standings"] * 2)
+        self.assertEqual(session.requests[0][1]['season'], "2021")
+
+    def test_poll_interval(self):
+        now = datetime.datetime(2021, 5, 1, 12, 0)
+        fetcher = make_fake_fetcher(FakeStatsApi())
+        daemon = StandingsDaemon(fetcher, now=lambda: now)
+        self.assertEqual(daemon.next_poll_seconds(), OFFSEASON_POLL_SECONDS)
+        daemon.game_starts = get_game_starts({'dates': [{'date': "2021-05-01", 'games': [
+            {'gameType': "R", 'gameDate': datetime.datetime(2021, 5, 1, 13, 0).astimezone().isoformat()},
+            {'gameType': "R", 'gameDate': datetime.datetime(2021, 5, 1, 19, 0).astimezone().isoformat()}]}]})
+        # a game might be over at 3
+        self.assertEqual(daemon.next_poll_seconds(), 3 * 60 * 60)
+        now = datetime.datetime(2021, 5, 1, 15, 30)
+        self.assertEqual(daemon.next_poll_seconds(), GAME_WINDOW_POLL_SECONDS)
+        now = datetime.datetime(2021, 5, 1, 19, 0)
+        self.assertEqual(daemon.next_poll_seconds(), 2 * 60 * 60)
+        now = datetime.datetime(2021, 5, 2, 1, 0)
+        self.assertEqual(daemon.next_poll_seconds(), OFFSEASON_POLL_SECONDS)
+
+    def test_only_writes_when_changed(self):
+        fake = FakeStatsApi()
+        fetcher = StandingsFetcher(quiet=True, rate_limiter=RateLimiter(rate=1e9, burst=1000), standings_source=fake.standings_data,
+                                   schedule_source=lambda startDate, endDate: {'dates': []}, sleep=lambda seconds: None)
+        standings = make_fake_standings(fake, fetcher)
+        for day in standings.store.days():
+            if day > datetime.date(2021, 6, 1):
+                standings.store.delete_day(day)
+        standings.write_to_json()
+
+        slept = []
+        odds_years = []
+        def playoff_odds(year: int) -> bool:
+            odds_years.append(year)
+            return True
+        daemon = StandingsDaemon(fetcher, year=2021, sleep=slept.append, playoff_odds=playoff_odds)
+        daemon.run(max_ticks=2)
+        # only after the write
+        self.assertEqual(odds_years, [2021])
+        self.assertEqual(daemon.standings.store.days()[-1], datetime.date(2021, 9, 30))
+        self.assertEqual(slept, [OFFSEASON_POLL_SECONDS])
+        self.assertEqual(fetcher.metrics.counters['daemon_ticks_total'], 2)
+        self.assertEqual(fetcher.metrics.counters['daemon_writes_total'], 1)
+        with open(self.temp_path / "2021.json", 'r') as f:
+            self.assertEqual(len(json.load(f)['standings']), 180)
+
+    def test_waits_for_new_season(self):
+        fake = FakeStatsApi(datetime.date(2022, 4, 7), datetime.date(2022, 10, 5))
+        fetcher = StandingsFetcher(quiet=True, rate_limiter=RateLimiter(rate=1e9, burst=1000), standings_source=fake.standings_data,
+                                   schedule_source=lambda startDate, endDate: {'dates': []}, sleep=lambda seconds: None)
+        slept = []
+        daemon = StandingsDaemon(fetcher, now=lambda: datetime.datetime(2022, 1, 2, 12, 0), sleep=slept.append)
+        daemon.run(max_ticks=2)
+        self.assertEqual(fake.calls, [])
+        self.assertNotIn('daemon_errors_total', fetcher.metrics.counters)
+        self.assertEqual(slept, [OFFSEASON_POLL_SECONDS])
+        self.assertFalse((self.temp_path / "2022.json").exists())
+
+class TestPopulate(unittest.TestCase):
+    def test_populate_with_fake(self):
+        fake = FakeStatsApi()
+        standings = make_fake_standings(fake)
+        all_days = sorted(standings.all_day_data.keys())
+        self.assertEqual(all_days[0], datetime.date(2021, 4, 4))
+        self.assertEqual(all_days[-1], datetime.date(2021, 9, 30))
+        self.assertEqual(len(all_days), datetime.date(2021, 9, 30).toordinal() - datetime.date(2021, 4, 4).toordinal() + 1)
+        self.assertTrue(standings.validate_and_fix_data())
+        last_day = standings.all_day_data[all_days[-1]]
+        self.assertEqual(str(last_day[200][0]), "%d-%d" % fake.record(0, datetime.date(2021, 9, 30)))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
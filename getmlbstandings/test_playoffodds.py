@@ -0,0 +1,67 @@
+import datetime
+import json
+import unittest
+from getmlbstandings.playoffodds import *
+from getmlbstandings.testsupport import FakeStatsApi, TempDataTestCase, make_fake_standings
+
+class TestPlayoffOdds(TempDataTestCase):
+    patched_modules = ("getmlbstandings", "playoffodds")
+
+    def test_sample_binomial(self):
+        rng = np.random.default_rng(0)
+        trials = np.array([0, 1, 20, 162])
+        probabilities = np.array([0.5, 0.3, 0.6, 0.45])
+        samples = sample_binomial(rng, trials, probabilities, 100000)
+        self.assertTrue((samples >= 0).all() and (samples <= trials).all())
+        np.testing.assert_allclose(samples.mean(axis=0), trials * probabilities, atol=0.1)
+        np.testing.assert_allclose(samples.var(axis=0), trials * probabilities * (1 - probabilities), rtol=0.05, atol=0.01)
+
+    def test_magic_numbers(self):
+        standings = make_fake_standings(populate=False)
+        store = standings.store
+        def numbers(day: datetime.date) -> tuple[list[int], list[int]]:
+            (magic, elimination) = magic_numbers(store.records[[store.row(day)]], standings.team_index, 162)
+            return (magic[0, :3].tolist(), elimination[0, :3].tolist())
+        day = datetime.date(2021, 9, 1)
+        store.set_team(day, 200, "Houston Astros", None, 90, 50)
+        store.set_team(day, 200, "Seattle Mariners", None, 80, 60)
+        store.set_team(day, 200, "Texas Rangers", None, 60, 80)
+        (magic, elimination) = numbers(day)
+        # Astros: 162 + 1 - 90 - 60
+        self.assertEqual(magic[:2], [13, 33])
+        # Rangers: 162 + 1 - 90 - 80 is less than 0, so they're out and have no magic number
+        self.assertEqual(elimination, [33, 13, 0])
+        self.assertEqual(magic[2], NO_NUMBER)
+
+        # the Astros have clinched, so they have no elimination number
+        day = datetime.date(2021, 9, 20)
+        store.set_team(day, 200, "Houston Astros", None, 100, 52)
+        store.set_team(day, 200, "Seattle Mariners", None, 85, 68)
+        store.set_team(day, 200, "Texas Rangers", None, MISSING, MISSING)
+        (magic, elimination) = numbers(day)
+        self.assertEqual(magic, [0, NO_NUMBER, NO_NUMBER])
+        self.assertEqual(elimination, [NO_NUMBER, 0, NO_NUMBER])
+
+    def test_compute_odds(self):
+        standings = make_fake_standings()
+        standings.write_to_json()
+        self.assertEqual(compute_odds([2020, 2021], simulations=1000, processes=1), [2021])
+        with open(self.temp_path / "odds" / "2021.json", 'r') as f:
+            odds = json.load(f)
+        self.assertEqual(odds['opening_day'], "2021/04/04")
+        teams = odds['teams']
+        self.assertEqual(len(teams["Houston Astros"]['division']), len(standings.store))
+        for day in range(len(standings.store)):
+            # someone wins each division, and every seed gets filled
+            self.assertAlmostEqual(sum(teams[team]['division'][day] for team in FakeStatsApi.DIVISIONS[200][1]), 1.0, places=3)
+            self.assertAlmostEqual(sum(teams[team]['seeds'][0][day] for team in FakeStatsApi.DIVISIONS[200][1]), 1.0, places=3)
+        # the Astros and Mariners finish 103-51 and the Rangers 102-52
+        self.assertGreater(teams["Houston Astros"]['division'][-1], teams["Texas Rangers"]['division'][-1])
+        self.assertEqual(teams["Texas Rangers"]['elimination_number'][-1], 162 + 1 - 103 - 52)
+        self.assertEqual(teams["Houston Astros"]['magic_number'][0], 163)
+        # nothing to do if the standings haven't changed
+        self.assertEqual(compute_odds([2021], simulations=1000, processes=1), [])
+        # the same seed gives the same odds
+        self.assertEqual(compute_odds([2021], simulations=1000, processes=1, force=True), [2021])
+        with open(self.temp_path / "odds" / "2021.json", 'r') as f:
+            self.assertEqual(json.load(f), odds)
@@ -0,0 +1,54 @@
+import json
+import os
+import shutil
+import unittest
+from getmlbstandings.getmlbstandings import get_json_file_path
+from getmlbstandings.seasonstore import *
+from getmlbstandings.testsupport import TempDataTestCase
+
+class TestSeasonStore(TempDataTestCase):
+    # the store is told where the files are, so nothing needs patching
+    patched_modules = ()
+
+    def setUp(self):
+        super().setUp()
+        self.data_path = self.temp_path
+        for year in (2007, 2024):
+            shutil.copy(get_json_file_path(year), self.data_path / f"{year}.json")
+
+    def test_matches_season_files(self):
+        store = SeasonStore.open(self.data_path)
+        self.assertEqual(store.years, [2007, 2024])
+        self.assertIsInstance(store.records, np.memmap)
+        with open(self.data_path / "2024.json", 'r') as f:
+            j = json.load(f)
+        curve = store.games_over_500("Colorado Rockies", 2024, 2024)[2024]
+        division_id, index = [(division_id, division['teams'].index("Colorado Rockies"))
+                              for (division_id, division) in j['metadata'].items() if "Colorado Rockies" in division['teams']][0]
+        self.assertEqual(curve.tolist(), [day[division_id][index][0] - day[division_id][index][1] for day in j['standings']])
+        self.assertEqual(list(store.team_records("Colorado Rockies").keys()), [2007, 2024])
+        self.assertEqual(store.team_records("Montreal Expos"), {})
+
+    def test_close_races(self):
+        store = SeasonStore.open(self.data_path)
+        self.assertEqual(len(store.final_races()), 12)
+        races = store.close_races(1, 2007, 2007)
+        self.assertEqual([(race.division_name, race.winner, race.runner_up, race.games_back) for race in races],
+                         [("National League West", "Arizona Diamondbacks", "Colorado Rockies", 0.5)])
+
+    def test_tied_races(self):
+        shutil.copy(get_json_file_path(2005), self.data_path / "2005.json")
+        store = SeasonStore.open(self.data_path)
+        # the Yankees won the AL East on the season series, which the standings don't show
+        [race] = [race for race in store.close_races(1, 2005, 2005) if race.division_name == "American League East"]
+        self.assertTrue(race.tied)
+        self.assertIsNone(race.winner)
+        self.assertEqual(race.leaders, ["Boston Red Sox", "New York Yankees"])
+        self.assertEqual(str(race), "2005 American League East: Boston Red Sox and New York Yankees tied for first")
+
+    def test_rebuilds_when_stale(self):
+        SeasonStore.open(self.data_path)
+        self.assertFalse(store_is_stale(self.data_path))
+        os.remove(self.data_path / "2007.json")
+        self.assertTrue(store_is_stale(self.data_path))
+        self.assertEqual(SeasonStore.open(self.data_path).years, [2024])
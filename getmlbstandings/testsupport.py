@@ -0,0 +1,98 @@
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Optional
+from unittest import mock
+from getmlbstandings.getmlbstandings import MlbMetadata, MlbYearStandings, RateLimiter, ResponseCache, StandingsFetcher, next_day
+
+# Fakes and fixtures shared by the tests, so they never touch the network or the real data directory.
+
+# the fake season's dates, unless a test needs others
+FAKE_OPENING_DAY = datetime.date(2021, 4, 5)
+FAKE_LAST_DAY = datetime.date(2021, 9, 30)
+
+class FakeStatsApi:
+    """Stands in for statsapi.standings_data with a small made-up season."""
+    DIVISIONS = {
+        200: ("American League West", ["Houston Astros", "Seattle Mariners", "Texas Rangers"]),
+        204: ("National League East", ["Atlanta Braves", "Miami Marlins", "New York Mets"]),
+    }
+
+    def __init__(self, opening_day: datetime.date = FAKE_OPENING_DAY, last_day: datetime.date = FAKE_LAST_DAY, failures: int = 0):
+        self.opening_day = opening_day
+        self.last_day = last_day
+        self.failures = failures
+        self.calls : list[datetime.date] = []
+
+    def record(self, team_index: int, date: datetime.date) -> tuple[int, int]:
+        wins = 0
+        losses = 0
+        day = self.opening_day
+        while day <= min(date, self.last_day):
+            day_number = day.toordinal() - self.opening_day.toordinal()
+            # every seventh day is an off day
+            if day_number % 7 != 6:
+                if (day_number + team_index) % 3 == 0:
+                    losses += 1
+                else:
+                    wins += 1
+            day = next_day(day)
+        return (wins, losses)
+
+    def standings_data(self, leagueId: str, date: str) -> dict:
+        parsed_date = datetime.datetime.strptime(date, '%m/%d/%Y').date()
+        self.calls.append(parsed_date)
+        if self.failures > 0:
+            self.failures -= 1
+            raise ValueError("fake failure")
+        if parsed_date < self.opening_day:
+            return {}
+        data = {}
+        team_index = 0
+        for division_id, (div_name, team_names) in self.DIVISIONS.items():
+            teams = []
+            for team_name in team_names:
+                wins, losses = self.record(team_index, parsed_date)
+                teams.append({'name': team_name, 'team_id': 100 + team_index, 'w': wins, 'l': losses})
+                team_index += 1
+            data[division_id] = {'div_name': div_name, 'teams': teams}
+        return data
+
+def make_fake_fetcher(fake: FakeStatsApi, workers: int = 4, cache: Optional[ResponseCache] = None) -> StandingsFetcher:
+    return StandingsFetcher(quiet=True, workers=workers, rate_limiter=RateLimiter(rate=1e9, burst=1000),
+                            standings_source=fake.standings_data, sleep=lambda seconds: None, cache=cache)
+
+def make_fake_standings(fake: Optional[FakeStatsApi] = None, fetcher: Optional[StandingsFetcher] = None,
+                        populate: bool = True) -> MlbYearStandings:
+    """The fake's season (a default FakeStatsApi if there's no fake), fetched with `fetcher`
+    (make_fake_fetcher's if there isn't one)."""
+    if fake is None:
+        fake = FakeStatsApi()
+    if fetcher is None:
+        fetcher = make_fake_fetcher(fake)
+    standings = MlbYearStandings(MlbMetadata.get_metadata(fake.opening_day.year, quiet=True, fetcher=fetcher), quiet=True, fetcher=fetcher)
+    if populate:
+        standings.populate()
+    return standings
+
+class TempDataTestCase(unittest.TestCase):
+    """Points get_json_file_path at a temporary directory, in the core module and in
+    every other module in `patched_modules` that imported it."""
+    patched_modules : tuple[str, ...] = ("getmlbstandings",)
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_path = Path(temp_dir.name)
+        for module in self.patched_modules:
+            patcher = mock.patch(f'getmlbstandings.{module}.get_json_file_path', self.get_json_file_path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_json_file_path(self, year: int) -> Path:
+        return self.temp_path / f"{year}.json"
+
+    def read_file(self, year: int) -> str:
+        with open(self.get_json_file_path(year), 'r') as f:
+            return f.read()
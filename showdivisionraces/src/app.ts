@@ -117,6 +117,52 @@ function get_plot_datas(all_standings: Array<Array<number[]>>, team_names: strin
     return plot_datas;
 }
 
+// Precomputed by getmlbstandings.py so we don't have to do it here.
+// Days without a record are null.
+interface DerivedTeamSeries {
+    wins: (number | null)[],
+    losses: (number | null)[]
+}
+interface DerivedChart {
+    title: string,
+    teams: string[],
+    leader_games_above_500: (number | null)[]
+}
+interface DerivedSeason {
+    opening_day: string,
+    teams: { [team_name: string]: DerivedTeamSeries },
+    charts: DerivedChart[]
+}
+
+// Same as get_plot_datas(), but from the precomputed series.
+function get_derived_plot_datas(derived: DerivedSeason, chart: DerivedChart, date_values: Date[]) : any[] {
+    let plot_datas = [];
+    const isDark = isDarkMode();
+    for (let i = 0; i < chart.teams.length; ++i) {
+        const team = derived.teams[chart.teams[i]];
+        // null leaves a gap in the line
+        const games_above_500 = team.wins.map((wins, day) => wins === null ? null : wins - team.losses[day]);
+        const hover_texts = team.wins.map((wins, day) => wins === null ? "" :
+            `${wins}-${team.losses[day]}\n${get_games_back_string([wins, team.losses[day]], chart.leader_games_above_500[day] ?? undefined)}`);
+        const team_colors = useTeamColors ? TEAM_NAMES_TO_COLORS.get(chart.teams[i]) : null;
+        plot_datas.push({
+            x: date_values.slice(0, games_above_500.length),
+            y: games_above_500,
+            text: hover_texts,
+            hoverinfo: "text+x",
+            name: chart.teams[i],
+            line: {
+                color: isDark ? team_colors?.dark : team_colors?.light,
+                width: 2
+            }
+        });
+    }
+    const last_value = (y: (number | null)[]) => y.filter(v => v !== null).pop() ?? -Infinity;
+    plot_datas.sort((data1, data2) => last_value(data2.y) - last_value(data1.y));
+    plot_datas.reverse();
+    return plot_datas;
+}
+
 function get_games_back_string(team_standing: number[], leader_games_above_500: number): string {
     if (leader_games_above_500 === undefined) {
         return "";
@@ -152,14 +198,29 @@ function get_division_name_sort_key(division_name: string): number {
     return key;
 }
 
-function addChart(title: string, subtitle: string | undefined, team_names: string[], all_standings: Array<Array<number[]>>, opening_day: Date, multiyear?: boolean) {
-    const isDark = isDarkMode();
-    const astros_standings = all_standings.map(x => x[0]);
+function get_date_values(opening_day: Date, length: number): Date[] {
     let date_values : Date[] = [opening_day];
-    while (date_values.length < astros_standings.length) {
+    while (date_values.length < length) {
         date_values.push(next_day(date_values[date_values.length - 1]))
     }
+    return date_values;
+}
+
+function addChart(title: string, subtitle: string | undefined, team_names: string[], all_standings: Array<Array<number[]>>, opening_day: Date, multiyear?: boolean) {
+    const astros_standings = all_standings.map(x => x[0]);
+    const date_values = get_date_values(opening_day, astros_standings.length);
     const plot_datas = get_plot_datas(all_standings, team_names, date_values);
+    plotChart(title, subtitle, team_names, plot_datas, multiyear);
+}
+
+function addDerivedChart(derived: DerivedSeason, chart: DerivedChart, opening_day: Date) {
+    const date_values = get_date_values(opening_day, chart.leader_games_above_500.length);
+    const plot_datas = get_derived_plot_datas(derived, chart, date_values);
+    plotChart(chart.title, undefined, chart.teams, plot_datas, false);
+}
+
+function plotChart(title: string, subtitle: string | undefined, team_names: string[], plot_datas: any[], multiyear?: boolean) {
+    const isDark = isDarkMode();
     const chartSection = document.getElementById("charts");
     let targetDiv = document.createElement('div');
     targetDiv.className = "chart";
@@ -285,12 +346,84 @@ function findDivisionIdAndIndex(data: any, teamName: string): {divisionId: strin
          ["2024 White Sox", "2025 Rockies"], all_standings, opening_day, true);
 }*/
 
-async function changeYear(year: string) {
-    let response = await fetch(`data/${year}.json`);
-    let raw_data : any = await response.json();
-    const opening_day_str_parts : number[] = (raw_data.opening_day as string).split('/').map(x => parseInt(x, 10));
+function parse_opening_day(opening_day_str: string): Date {
+    const opening_day_str_parts : number[] = opening_day_str.split('/').map(x => parseInt(x, 10));
     // month is 0-indexed
-    const opening_day : Date = new Date(opening_day_str_parts[0], opening_day_str_parts[1] - 1, opening_day_str_parts[2]);
+    return new Date(opening_day_str_parts[0], opening_day_str_parts[1] - 1, opening_day_str_parts[2]);
+}
+
+interface ManifestSeason {
+    file: string;
+    hash: string;
+    days: number;
+    derived?: string;
+}
+
+interface Manifest {
+    format: string;
+    seasons: {[year: string]: ManifestSeason};
+}
+
+// Fetched fresh on every year change (a cheap revalidation if it hasn't changed), since
+// the hashed files an older manifest points at get deleted a while after it's replaced.
+async function fetchManifest(): Promise<Manifest | undefined> {
+    return await fetchJson(`data/manifest.json`, {cache: "no-cache"});
+}
+
+async function fetchJson(path: string, init?: RequestInit): Promise<any | undefined> {
+    try {
+        let response = await fetch(path, init);
+        if (!response.ok) {
+            return undefined;
+        }
+        return await response.json();
+    }
+    catch {
+        return undefined;
+    }
+}
+
+// The paths to try for each file, in order. The content-hashed files in the manifest come
+// first, then the unhashed names, which are what webpack copies in for local builds and
+// what's there for years that haven't been published with a manifest.
+function getSeasonPaths(year: string, manifest: Manifest | undefined): {standings: string[], derived: string[]} {
+    const season = manifest?.seasons[year];
+    if (season === undefined) {
+        return {standings: [`data/${year}.json`], derived: [`data/derived/${year}.json`]};
+    }
+    // an unhashed derived file would be older than the hashed standings, so don't use it
+    return {standings: [`data/${season.file}`, `data/${year}.json`],
+            derived: season.derived !== undefined ? [`data/${season.derived}`] : []};
+}
+
+async function fetchFirstJson(paths: string[]): Promise<any | undefined> {
+    for (const path of paths) {
+        const j = await fetchJson(path);
+        if (j !== undefined) {
+            return j;
+        }
+    }
+    return undefined;
+}
+
+async function changeYear(year: string) {
+    const paths = getSeasonPaths(year, await fetchManifest());
+    const derived : DerivedSeason | undefined = await fetchFirstJson(paths.derived);
+    if (derived !== undefined) {
+        const opening_day = parse_opening_day(derived.opening_day);
+        document.getElementById("charts").innerHTML = '';
+        for (const chart of derived.charts) {
+            addDerivedChart(derived, chart, opening_day);
+        }
+        return;
+    }
+    // no precomputed series, so compute them from the standings
+    let raw_data : any = await fetchFirstJson(paths.standings);
+    if (raw_data === undefined) {
+        document.getElementById("charts").innerHTML = `Couldn't load the standings for ${year}, try again later.`;
+        return;
+    }
+    const opening_day = parse_opening_day(raw_data.opening_day as string);
     const isDark = isDarkMode();
     let divisionIds = Object.keys(raw_data.metadata);
     divisionIds.sort((a, b) => get_division_name_sort_key(raw_data.metadata[a]['name']) - get_division_name_sort_key(raw_data.metadata[b]['name']));
@@ -26,7 +26,8 @@ module.exports = {
     new CopyPlugin({
       patterns: [
         {from: paths.public, to: paths.dist},
-        {from: paths.sourcemlbdata, to: paths.distdata}
+        // the season store and the playoff odds are only for the scripts, not the site
+        {from: paths.sourcemlbdata, to: paths.distdata, globOptions: {ignore: ['**/store/**', '**/odds/**']}}
       ]
     }),
   ],